@@ -1,11 +1,14 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from user_cache import user_cache, load_cacheable_user
 
 load_dotenv()
 
@@ -13,9 +16,19 @@ JWT_SECRET = os.getenv("JWT_SECRET", "fishnet_secret_key_2026")
 JWT_EXPIRE_DAYS = 30
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; hashes made with a different cost are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_POOL_SIZE = int(os.getenv("BCRYPT_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+BCRYPT_QUEUE_LIMIT = int(os.getenv("BCRYPT_QUEUE_LIMIT", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 bearer_scheme = HTTPBearer()
 
+# bcrypt releases the GIL, so a thread pool gives real parallelism and keeps
+# the event loop free while hashes are computed.
+_hash_pool = ThreadPoolExecutor(max_workers=BCRYPT_POOL_SIZE, thread_name_prefix="bcrypt")
+_hash_pending = 0
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -25,6 +38,40 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+def hash_queue_depth() -> int:
+    """bcrypt jobs queued or running in the hash pool."""
+    return _hash_pending
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _hash_pending
+    if _hash_pending >= BCRYPT_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop. Returns (valid, new_hash); new_hash is set
+    when the stored hash uses an outdated cost factor and should be replaced."""
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain, hashed)
+
+
+def shutdown_hash_pool():
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(user_id: str) -> str:
     expire = datetime.utcnow() + timedelta(days=JWT_EXPIRE_DAYS)
     payload = {"id": user_id, "exp": expire}
@@ -50,10 +97,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
     token = credentials.credentials
     user_id = decode_token(token)
 
-    db = get_db()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = user_cache.get(user_id)
+    if user is None:
+        db = get_db()
+        user = await load_cacheable_user(db, ObjectId(user_id))
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_cache.put(user_id, user)
     if not user.get("active", True):
         raise HTTPException(status_code=401, detail="Account is deactivated")
     return user
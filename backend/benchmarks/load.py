@@ -0,0 +1,307 @@
+"""Load test: drive main.app in-process and report per-route latency and throughput.
+
+Seeds N users and M catches, then runs each scripted mix for a fixed time
+with a pool of concurrent clients. Results are written as JSON so runs on
+two commits can be compared with --baseline.
+
+    cd backend && python -m benchmarks.load --users 50 --catches 5000 --duration 10
+    cd backend && python -m benchmarks.load --memory --mix feed stats   # mongomock_motor
+    cd backend && python -m benchmarks.load --output after.json --baseline before.json
+
+Against a real mongod the database named in --mongo-uri is dropped first,
+so its name must contain "bench".
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+import httpx
+import auth_utils
+import database
+import ratelimit
+from auth_utils import create_access_token, hash_password, shutdown_hash_pool
+from catch_stats import empty_stats
+from indexes import ensure_indexes
+from ledger import ledger
+from leaderboard import leaderboards
+from side_effects import side_effect_queue
+from main import app
+from benchmarks.login_storm import percentile
+
+PASSWORD = "correct horse"
+FISH_TYPES = ["Seer Fish", "Pomfret", "Mackerel", "Sardine", "Tuna", "Prawns", "Crab", "Red Snapper"]
+REGIONS = ["Tamil Nadu Coast", "Kerala Coast", "Andhra Coast"]
+
+# Weighted (operation, weight) lists; each client picks the next operation at random
+MIXES = {
+    "login": [("login", 1)],
+    "inserts": [("create_catch", 1)],
+    "feed": [("feed_all", 3), ("feed_mine", 2), ("feed_page2", 2)],
+    "stats": [("stats", 2), ("stats_series", 2), ("leaderboard", 1), ("me", 1)],
+    "mixed": [("feed_all", 6), ("feed_mine", 3), ("me", 4), ("stats_series", 2),
+              ("leaderboard", 2), ("create_catch", 2), ("login", 1)],
+}
+
+
+def random_catch(rng: random.Random, key: str = None) -> dict:
+    lat, lng = 8.0 + rng.random() * 6, 76.5 + rng.random() * 4
+    item = {
+        "fishType": rng.choice(FISH_TYPES),
+        "quantity": rng.randint(1, 50),
+        "weight": round(rng.uniform(0.5, 40), 2),
+        "location": {"latitude": lat, "longitude": lng, "address": "Kasimedu Harbour, Chennai"},
+        "time": "05:42 am",
+        "notes": "Caught near the reef before sunrise",
+        "weather": {"temperature": 28.5, "condition": "Clear", "windSpeed": 12.0},
+    }
+    if key:
+        item["idempotencyKey"] = key
+    return item
+
+
+# ─── Setup ──────────────────────────────────────────────────────────────────────
+
+async def open_db(args) -> str:
+    if args.memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("❌ --memory needs mongomock_motor: pip install mongomock-motor")
+        database.client = AsyncMongoMockClient()
+        database.db = database.client["fishnet_bench"]
+        return "mongomock_motor"
+
+    database.MONGODB_URI = args.mongo_uri
+    await database.connect_db()
+    name = database.db.name
+    if "bench" not in name:
+        sys.exit(f"❌ Refusing to drop database '{name}'; use a database name containing 'bench'")
+    await database.client.drop_database(name)
+    return "mongod"
+
+
+async def seed(client: httpx.AsyncClient, args, rng: random.Random) -> list:
+    """Insert users directly, then their catches through POST /api/catches/batch."""
+    db = database.get_db()
+    hashed = hash_password(PASSWORD)  # one hash for every user; seeding should not time bcrypt
+    now = datetime.utcnow()
+    docs = [{
+        "name": f"Bench Fisher {i}",
+        "email": f"bench{i}@example.com",
+        "password": hashed,
+        "phone": "",
+        "region": REGIONS[i % len(REGIONS)],
+        "boatName": "",
+        "experience": i % 30,
+        "profilePhoto": "",
+        "tokens": 800,
+        "role": "fisherman",
+        "verified": False,
+        "active": True,
+        "stats": empty_stats(),
+        "createdAt": now,
+        "updatedAt": now,
+    } for i in range(args.users)]
+    result = await db.users.insert_many(docs)
+
+    users = [{"id": str(uid), "email": doc["email"], "token": create_access_token(str(uid))}
+             for uid, doc in zip(result.inserted_ids, docs)]
+
+    start = time.perf_counter()
+    per_user, extra = divmod(args.catches, len(users))
+    for i, user in enumerate(users):
+        remaining = per_user + (1 if i < extra else 0)
+        while remaining:
+            n = min(remaining, 500)
+            items = [random_catch(rng, f"seed-{i}-{remaining - k}") for k in range(n)]
+            r = await client.post("/api/catches/batch", json={"items": items}, headers=auth(user))
+            r.raise_for_status()
+            remaining -= n
+    print(f"✅ Seeded {len(users)} users and {args.catches} catches in {time.perf_counter() - start:.1f}s")
+    return users
+
+
+def auth(user: dict) -> dict:
+    return {"Authorization": f"Bearer {user['token']}"}
+
+
+# ─── Operations ─────────────────────────────────────────────────────────────────
+# Each returns (route label, response); the label groups samples in the report.
+
+async def op_login(client, user, rng):
+    return "POST /api/auth/login", await client.post(
+        "/api/auth/login", json={"email": user["email"], "password": PASSWORD})
+
+
+async def op_me(client, user, rng):
+    return "GET /api/auth/me", await client.get("/api/auth/me", headers=auth(user))
+
+
+async def op_create_catch(client, user, rng):
+    key = f"bench-{rng.getrandbits(64):x}"
+    return "POST /api/catches", await client.post(
+        "/api/catches/", json=random_catch(rng, key), headers=auth(user))
+
+
+async def op_feed_all(client, user, rng):
+    params = {"fishType": rng.choice(FISH_TYPES)} if rng.random() < 0.3 else {}
+    return "GET /api/catches/all", await client.get("/api/catches/all", params=params, headers=auth(user))
+
+
+async def op_feed_mine(client, user, rng):
+    response = await client.get("/api/catches/", params={"limit": 20}, headers=auth(user))
+    if response.status_code == 200:
+        user["cursor"] = response.json().get("nextCursor")
+    return "GET /api/catches", response
+
+
+async def op_feed_page2(client, user, rng):
+    """Next page after the user's last op_feed_mine; falls back to the first page."""
+    params = {"limit": 20, "cursor": user["cursor"]} if user.get("cursor") else {"limit": 20}
+    return "GET /api/catches?cursor", await client.get("/api/catches/", params=params, headers=auth(user))
+
+
+async def op_stats(client, user, rng):
+    return "GET /api/catches/stats", await client.get("/api/catches/stats", headers=auth(user))
+
+
+async def op_stats_series(client, user, rng):
+    params = {"granularity": rng.choice(["day", "week", "month"]), "groupBy": "fishType"}
+    return "GET /api/catches/stats?granularity", await client.get(
+        "/api/catches/stats", params=params, headers=auth(user))
+
+
+async def op_leaderboard(client, user, rng):
+    params = {"window": rng.choice(["all", "week"])}
+    return "GET /api/leaderboard", await client.get("/api/leaderboard/", params=params, headers=auth(user))
+
+
+OPERATIONS = {name[3:]: fn for name, fn in globals().items() if name.startswith("op_")}
+
+
+# ─── Runner ─────────────────────────────────────────────────────────────────────
+
+async def run_mix(client, name: str, users: list, args, rng: random.Random) -> dict:
+    ops, weights = zip(*MIXES[name])
+    samples, statuses = {}, {}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(seed):
+        local = random.Random(seed)
+        while time.perf_counter() < deadline:
+            fn = OPERATIONS[local.choices(ops, weights)[0]]
+            user = local.choice(users)
+            start = time.perf_counter()
+            try:
+                route, response = await fn(client, user, local)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                route, status = fn.__name__, type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            samples.setdefault(route, []).append(elapsed)
+            statuses.setdefault(route, {}).setdefault(str(status), 0)
+            statuses[route][str(status)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(rng.random()) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, latencies in sorted(samples.items()):
+        routes[route] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+            "status": statuses[route],
+        }
+    total = sum(r["requests"] for r in routes.values())
+    return {"duration": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 1), "routes": routes}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_mix(name: str, result: dict, baseline: dict = None):
+    print(f"\n{name}: {result['requests']} requests, {result['rps']} req/s")
+    print(f"  {'route':<36}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  status")
+    for route, r in result["routes"].items():
+        line = (f"  {route:<36}{r['requests']:>7}{r['rps']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}"
+                f"{r['p99']:>9.1f}  {' '.join(f'{s}×{n}' for s, n in r['status'].items())}")
+        before = (baseline or {}).get("routes", {}).get(route)
+        if before and before["p95"]:
+            line += f"  p95 {(r['p95'] - before['p95']) / before['p95']:+.0%} vs baseline"
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGODB_URI", "mongodb://localhost:27017/fishnet_bench"))
+    parser.add_argument("--memory", action="store_true", help="use mongomock_motor instead of mongod")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--catches", type=int, default=5000)
+    parser.add_argument("--mix", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per mix")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep per-route rate limits on; every simulated client shares one IP")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier results file to compare p95 against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ratelimit.RATE_LIMIT_ENABLED = args.rate_limits
+    backend = await open_db(args)
+    await ensure_indexes(database.get_db())
+    ledger.start()
+    leaderboards.start()
+    side_effect_queue.start()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("mixes", {})
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "backend": backend,
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "bcrypt": {"rounds": auth_utils.BCRYPT_ROUNDS, "pool": auth_utils.BCRYPT_POOL_SIZE},
+        "mixes": {},
+    }
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            users = await seed(client, args, rng)
+            for name in args.mix:
+                result = await run_mix(client, name, users, args, rng)
+                report["mixes"][name] = result
+                print_mix(name, result, baseline.get(name))
+    finally:
+        await side_effect_queue.stop()
+        await leaderboards.stop()
+        await ledger.stop()
+        await database.close_db()
+        shutdown_hash_pool()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Latency of an unrelated endpoint (/health) while a login storm runs.
+
+Compares verifying bcrypt hashes inline on the event loop (the old
+handlers) with the bounded hash pool in auth_utils.
+
+    cd backend && python -m benchmarks.login_storm --workers 32 --duration 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from fastapi import HTTPException
+import auth_utils
+from main import app
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _login_inline(hashed):
+    auth_utils.pwd_context.verify("correct horse", hashed)
+
+
+async def _login_pool(hashed):
+    await auth_utils.verify_password_async("correct horse", hashed)
+
+
+async def run_storm(mode: str, workers: int, duration: float, hashed: str) -> dict:
+    login = _login_inline if mode == "inline" else _login_pool
+    deadline = time.perf_counter() + duration
+    logins = rejected = 0
+
+    async def storm_worker():
+        nonlocal logins, rejected
+        while time.perf_counter() < deadline:
+            try:
+                await login(hashed)
+                logins += 1
+            except HTTPException:
+                rejected += 1
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0)
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/health")
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *(storm_worker() for _ in range(workers)))
+
+    return {
+        "mode": mode,
+        "logins": logins,
+        "rejected": rejected,
+        "probes": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=0.0),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=32, help="concurrent login loops")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per mode")
+    args = parser.parse_args()
+
+    hashed = auth_utils.hash_password("correct horse")
+    print(f"bcrypt rounds={auth_utils.BCRYPT_ROUNDS} pool={auth_utils.BCRYPT_POOL_SIZE} "
+          f"queue limit={auth_utils.BCRYPT_QUEUE_LIMIT} storm workers={args.workers}")
+    print(f"{'mode':<8}{'logins':>8}{'503s':>7}{'probes':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode in ("inline", "pool"):
+        r = await run_storm(mode, args.workers, args.duration, hashed)
+        print(f"{r['mode']:<8}{r['logins']:>8}{r['rejected']:>7}{r['probes']:>8}"
+              f"{r['p50']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Serialization cost of one 500-item /api/catches/all page, before and after.
+
+before: full documents, the old field-by-field catch_to_dict with str()
+        datetimes, then FastAPI's jsonable_encoder and json.dumps.
+after:  documents as returned by CATCH_PROJECTION, the current
+        catch_to_dict, and orjson straight to bytes.
+
+    cd backend && python -m benchmarks.serialization --items 500 --rounds 200
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from responses import dumps
+from routes.catches import catch_to_dict, CATCH_PROJECTION
+
+
+def legacy_catch_to_dict(c: dict) -> dict:
+    return {
+        "id": str(c["_id"]),
+        "fishType": c.get("fishType", ""),
+        "quantity": c.get("quantity", 0),
+        "weight": c.get("weight", 0),
+        "location": c.get("location", {}),
+        "date": str(c.get("date", datetime.utcnow())),
+        "time": c.get("time", ""),
+        "userId": c.get("userId", "anonymous"),
+        "userName": c.get("userName", "Fisher"),
+        "notes": c.get("notes", ""),
+        "weather": c.get("weather"),
+        "verified": c.get("verified", False),
+        "createdAt": str(c.get("createdAt", datetime.utcnow())),
+    }
+
+
+def make_catch(i: int) -> dict:
+    now = datetime(2026, 3, 1) - timedelta(minutes=i)
+    lat, lng = 13.0 + random.random(), 80.2 + random.random()
+    return {
+        "_id": ObjectId(),
+        "fishType": random.choice(["Seer Fish", "Pomfret", "Mackerel", "Sardine", "Tuna"]),
+        "quantity": random.randint(1, 50),
+        "weight": round(random.uniform(0.5, 40), 2),
+        "location": {"latitude": lat, "longitude": lng, "address": "Kasimedu Harbour, Chennai"},
+        "geo": {"type": "Point", "coordinates": [lng, lat]},
+        "date": now,
+        "time": "05:42 am",
+        "userId": str(ObjectId()),
+        "userName": "Murugan",
+        "region": "Tamil Nadu Coast",
+        "notes": "Caught near the reef before sunrise",
+        "weather": {"temperature": 28.5, "condition": "Clear", "windSpeed": 12.0},
+        "verified": False,
+        "idempotencyKey": f"device-1-{i}",
+        "createdAt": now,
+        "updatedAt": now,
+        "version": 1,
+    }
+
+
+def project(doc: dict) -> dict:
+    return {k: v for k, v in doc.items() if k == "_id" or k in CATCH_PROJECTION}
+
+
+def before(docs) -> bytes:
+    data = [legacy_catch_to_dict(c) for c in docs]
+    payload = jsonable_encoder({"success": True, "count": len(data), "data": data})
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def after(docs) -> bytes:
+    data = [catch_to_dict(c) for c in docs]
+    return dumps({"success": True, "count": len(data), "data": data})
+
+
+def measure(fn, docs, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = fn(docs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(42)
+    full = [make_catch(i) for i in range(args.items)]
+    projected = [project(c) for c in full]
+
+    old_median, old_min, old_size = measure(before, full, args.rounds)
+    new_median, new_min, new_size = measure(after, projected, args.rounds)
+
+    print(f"{args.items}-item page, {args.rounds} rounds")
+    print(f"{'path':<8}{'median ms':>11}{'min ms':>9}{'bytes':>9}")
+    print(f"{'before':<8}{old_median:>11.3f}{old_min:>9.3f}{old_size:>9}")
+    print(f"{'after':<8}{new_median:>11.3f}{new_min:>9.3f}{new_size:>9}")
+    print(f"speedup x{old_median / new_median:.1f}")
+
+
+if __name__ == "__main__":
+    main()
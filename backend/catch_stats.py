@@ -0,0 +1,157 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from user_cache import user_cache
+
+STATS_BATCH_SIZE = 1000
+
+
+def empty_stats() -> dict:
+    return {"totalCatches": 0, "totalWeight": 0, "uniqueFishTypes": 0, "fishTypeCounts": {}}
+
+
+def fish_type_key(fish_type: Optional[str]) -> str:
+    """Encode a fishType so it can be used as a field name under stats.fishTypeCounts."""
+    if not fish_type:
+        return "%"
+    return fish_type.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def stats_delta(added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    """Net (catches, weight, per-fish-type) change from catches added and removed."""
+    added, removed = list(added), list(removed)
+    count = len(added) - len(removed)
+    weight = sum(c.get("weight") or 0 for c in added) - sum(c.get("weight") or 0 for c in removed)
+
+    types = {}
+    for c in added:
+        key = fish_type_key(c.get("fishType"))
+        types[key] = types.get(key, 0) + 1
+    for c in removed:
+        key = fish_type_key(c.get("fishType"))
+        types[key] = types.get(key, 0) - 1
+
+    return count, weight, {k: n for k, n in types.items() if n}
+
+
+# Number of fish types with a positive counter, computed server-side
+UNIQUE_TYPES_EXPR = {"$size": {"$filter": {
+    "input": {"$objectToArray": {"$ifNull": ["$stats.fishTypeCounts", {}]}},
+    "cond": {"$gt": ["$$this.v", 0]},
+}}}
+
+STATS_POST_IMAGE = {"name": 1, "region": 1, "stats.totalCatches": 1, "stats.totalWeight": 1}
+
+
+async def apply_stats_changes(db, changes: Dict[ObjectId, tuple]) -> Dict[ObjectId, dict]:
+    """Apply catches added/removed for many users with one bulk_write of $inc.
+
+    `changes` maps user id to (added, removed). uniqueFishTypes is then
+    recounted from the counter map by one pipeline update for the users
+    whose per-type counters moved. Users created before the counter map
+    existed are rebuilt from catches instead.
+
+    Returns post-images (name, region and stats totals) by user id.
+    """
+    deltas = {}
+    for user_id, (added, removed) in changes.items():
+        count, weight, types = stats_delta(added, removed)
+        if count or weight or types:
+            deltas[user_id] = (count, weight, types)
+    if not deltas:
+        return {}
+
+    ids = list(deltas)
+    legacy = set()
+    async for user in db.users.find({"_id": {"$in": ids}, "stats.fishTypeCounts": {"$exists": False}}, {"_id": 1}):
+        legacy.add(user["_id"])
+
+    now = datetime.utcnow()
+    ops, typed = [], []
+    for user_id, (count, weight, types) in deltas.items():
+        if user_id in legacy:
+            continue
+        inc = {f"stats.fishTypeCounts.{key}": n for key, n in types.items()}
+        if count:
+            inc["stats.totalCatches"] = count
+        if weight:
+            inc["stats.totalWeight"] = weight
+        ops.append(UpdateOne(
+            {"_id": user_id, "stats.fishTypeCounts": {"$exists": True}},
+            {"$inc": inc, "$set": {"updatedAt": now}},
+        ))
+        if types:
+            typed.append(user_id)
+
+    if ops:
+        await db.users.bulk_write(ops, ordered=False)
+    if typed:
+        await db.users.update_many({"_id": {"$in": typed}}, [{"$set": {"stats.uniqueFishTypes": UNIQUE_TYPES_EXPR}}])
+    for user_id in legacy:
+        await rebuild_user_stats(db, user_id)
+    for user_id in ids:
+        user_cache.invalidate(user_id)
+
+    users = {}
+    async for user in db.users.find({"_id": {"$in": ids}}, STATS_POST_IMAGE):
+        users[user["_id"]] = user
+    return users
+
+
+async def rebuild_user_stats(db, user_id: Optional[ObjectId] = None) -> int:
+    """Recompute stats from the catches collection in one aggregation pass.
+
+    Rebuilds a single user when user_id is given, otherwise every user.
+    Returns the number of users that have catches.
+    """
+    match = {"userId": str(user_id)} if user_id is not None else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"userId": "$userId", "fishType": "$fishType"},
+            "count": {"$sum": 1},
+            "weight": {"$sum": "$weight"},
+        }},
+        {"$group": {
+            "_id": "$_id.userId",
+            "totalCatches": {"$sum": "$count"},
+            "totalWeight": {"$sum": "$weight"},
+            "types": {"$push": {"k": "$_id.fishType", "v": "$count"}},
+        }},
+    ]
+
+    seen, ops = [], []
+    async for row in db.catches.aggregate(pipeline, allowDiskUse=True):
+        if not ObjectId.is_valid(row["_id"]):
+            continue
+        counts = {}
+        for t in row["types"]:
+            key = fish_type_key(t["k"])
+            counts[key] = counts.get(key, 0) + t["v"]
+        stats = {
+            "totalCatches": row["totalCatches"],
+            "totalWeight": row["totalWeight"],
+            "uniqueFishTypes": len(counts),
+            "fishTypeCounts": counts,
+        }
+        seen.append(ObjectId(row["_id"]))
+        ops.append(UpdateOne({"_id": seen[-1]}, {"$set": {"stats": stats}}))
+        if len(ops) >= STATS_BATCH_SIZE:
+            await db.users.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await db.users.bulk_write(ops, ordered=False)
+
+    # Users with no catches left get zeroed counters
+    if user_id is not None:
+        if not seen:
+            await db.users.update_one({"_id": user_id}, {"$set": {"stats": empty_stats()}})
+    else:
+        await db.users.update_many({"_id": {"$nin": seen}}, {"$set": {"stats": empty_stats()}})
+
+    if user_id is not None:
+        user_cache.invalidate(user_id)
+    else:
+        user_cache.clear()
+    return len(seen)
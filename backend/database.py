@@ -1,20 +1,82 @@
 import os
+import asyncio
+from urllib.parse import urlsplit, parse_qsl
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 from dotenv import load_dotenv
+from metrics import mongo_listeners
 
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/fishnet")
 
+# Connection pool and timeouts. pymongo lets keyword arguments override the URI,
+# so these are only passed for options MONGODB_URI doesn't set itself.
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+# Comma-separated wire compressors in order of preference, e.g. "zstd,snappy,zlib"
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Connections opened at startup so the first requests don't pay for the handshakes
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(max(MONGO_MIN_POOL_SIZE, 4))))
+
+# Read preference for public, staleness-tolerant reads (feed, stats, maps).
+# Writes and anything read back for a write (balances, versions) use the primary.
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+MONGO_MAX_STALENESS_S = int(os.getenv("MONGO_MAX_STALENESS_S", "-1"))
+
 client: AsyncIOMotorClient = None
 db = None
+read_db = None
+
+
+def uri_option_names(uri: str) -> set:
+    """Lower-cased option names in a connection string's query."""
+    return {name.lower() for name, _ in parse_qsl(urlsplit(uri).query)}
+
+
+def client_options(uri: str = MONGODB_URI) -> dict:
+    options = {
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None,
+        "event_listeners": mongo_listeners(),
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    in_uri = uri_option_names(uri)
+    return {name: value for name, value in options.items() if name.lower() not in in_uri}
+
 
 async def connect_db():
-    global client, db
-    client = AsyncIOMotorClient(MONGODB_URI)
+    global client, db, read_db
+    client = AsyncIOMotorClient(MONGODB_URI, **client_options())
     db = client.get_default_database()
+    read_pref = make_read_preference(
+        read_pref_mode_from_name(MONGO_READ_PREFERENCE), None, max_staleness=MONGO_MAX_STALENESS_S
+    )
+    read_db = db.with_options(read_preference=read_pref)
     print(f"✅ Connected to MongoDB")
 
+async def warm_up():
+    """Open MONGO_WARMUP_CONNECTIONS pooled connections with concurrent pings."""
+    if MONGO_WARMUP_CONNECTIONS <= 0:
+        return
+    results = await asyncio.gather(
+        *(db.command("ping") for _ in range(MONGO_WARMUP_CONNECTIONS)), return_exceptions=True
+    )
+    failed = [r for r in results if isinstance(r, Exception)]
+    if failed:
+        print(f"⚠️  MongoDB warmup: {len(failed)} of {len(results)} pings failed: {failed[0]}")
+    else:
+        print(f"✅ Warmed up {len(results)} MongoDB connections")
+
 async def close_db():
     global client
     if client:
@@ -23,3 +85,7 @@ async def close_db():
 
 def get_db():
     return db
+
+def get_read_db():
+    """Database handle for reads that may be served by a secondary."""
+    return read_db if read_db is not None else db
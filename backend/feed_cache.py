@@ -0,0 +1,90 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", "5"))
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "256"))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists this ETag (weak or strong)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class FeedCache:
+    """Pre-serialized /api/catches/all response bodies keyed by (fishType, limit).
+
+    Catch writes call invalidate() with the fish types they touched, which
+    drops the unfiltered feed and those types' feeds. The short TTL covers
+    writes made by other workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        """Return (etag, body) for a fresh entry, or None."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: tuple, body: bytes, generation: int) -> str:
+        """Store a body built while the cache was at `generation`.
+
+        Bodies read before a concurrent write invalidated the cache are not
+        stored, so a slow query cannot resurrect a stale feed.
+        """
+        etag = make_etag(body)
+        if generation == self.generation and self.maxsize > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, fish_types: Iterable[str]):
+        fish_types = set(fish_types)
+        self.generation += 1
+        for key in [k for k in self._entries if k[0] is None or k[0] in fish_types]:
+            del self._entries[key]
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+feed_cache = FeedCache(FEED_CACHE_SIZE, FEED_CACHE_TTL)
@@ -0,0 +1,75 @@
+import math
+from typing import List, Optional
+from fastapi import HTTPException
+
+EARTH_RADIUS_M = 6378100
+MAX_RADIUS_M = 200_000
+
+
+def geo_point(location: Optional[dict]) -> Optional[dict]:
+    """GeoJSON point for a stored location dict, or None if it has no coordinates."""
+    if not location:
+        return None
+    lat, lng = location.get("latitude"), location.get("longitude")
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def parse_bbox(bbox: str) -> List[float]:
+    """Parse "minLng,minLat,maxLng,maxLat"."""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minLng,minLat,maxLng,maxLat")
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range")
+    return [min_lng, min_lat, max_lng, max_lat]
+
+
+def within_radius(lat: float, lng: float, radius_m: float) -> dict:
+    return {"$geoWithin": {"$centerSphere": [[lng, lat], radius_m / EARTH_RADIUS_M]}}
+
+
+# Polygon edges are geodesics, so a viewport is cut into parts no wider than
+# BBOX_PART_DEG (a ring over a hemisphere would match its complement) and
+# the parallels are traced with a vertex every BBOX_EDGE_STEP_DEG
+BBOX_PART_DEG = 90.0
+BBOX_EDGE_STEP_DEG = 1.0
+# Every longitude meets at a pole, which would make a degenerate ring
+MAX_BBOX_LAT = 89.9
+
+
+def _parallel(lat: float, from_lng: float, to_lng: float) -> List[List[float]]:
+    steps = max(1, math.ceil(abs(to_lng - from_lng) / BBOX_EDGE_STEP_DEG))
+    return [[from_lng + (to_lng - from_lng) * i / steps, lat] for i in range(steps + 1)]
+
+
+def within_bbox(bbox: List[float]) -> dict:
+    """$geoWithin matching the lat/lng rectangle, not the geodesic polygon through its corners."""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    min_lat, max_lat = max(min_lat, -MAX_BBOX_LAT), min(max_lat, MAX_BBOX_LAT)
+    parts = max(1, math.ceil((max_lng - min_lng) / BBOX_PART_DEG))
+    width = (max_lng - min_lng) / parts
+    polygons = []
+    for i in range(parts):
+        west, east = min_lng + i * width, min_lng + (i + 1) * width
+        ring = _parallel(min_lat, west, east) + _parallel(max_lat, east, west)
+        polygons.append([ring + [ring[0]]])
+    return {"$geoWithin": {"$geometry": {"type": "MultiPolygon", "coordinates": polygons}}}
+
+
+# Server-side backfill for catches stored before the geo field existed
+BACKFILL_FILTER = {
+    "geo": {"$exists": False},
+    "location.latitude": {"$type": "number", "$gte": -90, "$lte": 90},
+    "location.longitude": {"$type": "number", "$gte": -180, "$lte": 180},
+}
+BACKFILL_UPDATE = [
+    {"$set": {"geo": {"type": "Point", "coordinates": ["$location.longitude", "$location.latitude"]}}},
+]
+
+
+async def backfill_geo(db) -> int:
+    result = await db.catches.update_many(BACKFILL_FILTER, BACKFILL_UPDATE)
+    return result.modified_count
@@ -0,0 +1,156 @@
+import math
+from datetime import datetime
+from typing import Iterable, List, Optional
+from pymongo import UpdateOne
+
+# Grid cell size in degrees for each rollup level, coarsest first
+HEATMAP_LEVELS = [1.0, 0.25, 0.05, 0.01]
+# Highest map zoom served by each level; anything above uses the finest
+ZOOM_LEVEL_LIMITS = [5, 8, 11]
+HEATMAP_MAX_CELLS = 5000
+
+
+def level_for_zoom(zoom: int) -> int:
+    for level, max_zoom in enumerate(ZOOM_LEVEL_LIMITS):
+        if zoom <= max_zoom:
+            return level
+    return len(HEATMAP_LEVELS) - 1
+
+
+def cell_of(lat: float, lng: float, level: int):
+    size = HEATMAP_LEVELS[level]
+    return math.floor((lat + 90) / size), math.floor((lng + 180) / size)
+
+
+def cell_center(iy: int, ix: int, level: int):
+    size = HEATMAP_LEVELS[level]
+    return (iy + 0.5) * size - 90, (ix + 0.5) * size - 180
+
+
+def day_of(date: Optional[datetime]) -> Optional[str]:
+    return date.strftime("%Y-%m-%d") if date else None
+
+
+def heatmap_deltas(added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> dict:
+    """Net (count, weight) change per (level, iy, ix, fishType, day) cell."""
+    deltas = {}
+    for docs, sign in ((added, 1), (removed, -1)):
+        for c in docs:
+            location = c.get("location") or {}
+            lat, lng = location.get("latitude"), location.get("longitude")
+            if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+                continue
+            for level in range(len(HEATMAP_LEVELS)):
+                key = (level, *cell_of(lat, lng, level), c.get("fishType"), day_of(c.get("date")))
+                count, weight = deltas.get(key, (0, 0))
+                deltas[key] = (count + sign, weight + sign * (c.get("weight") or 0))
+    return {k: v for k, v in deltas.items() if v[0] or v[1]}
+
+
+async def apply_heatmap_change(db, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    ops = []
+    for (level, iy, ix, fish_type, day), (count, weight) in heatmap_deltas(added, removed).items():
+        lat, lng = cell_center(iy, ix, level)
+        ops.append(UpdateOne(
+            {"level": level, "iy": iy, "ix": ix, "fishType": fish_type, "day": day},
+            {"$inc": {"count": count, "weight": weight}, "$setOnInsert": {"lat": lat, "lng": lng}},
+            upsert=True,
+        ))
+    if ops:
+        await db.catch_heatmap.bulk_write(ops, ordered=False)
+
+
+async def rebuild_heatmap(db) -> int:
+    """Regenerate catch_heatmap from catches in one aggregation pass ($out)."""
+    levels = [{"level": i, "size": size} for i, size in enumerate(HEATMAP_LEVELS)]
+
+    def cell(coord, offset):
+        return {"$floor": {"$divide": [{"$add": [coord, offset]}, "$levels.size"]}}
+
+    def center(index, offset):
+        return {"$subtract": [{"$multiply": [{"$add": [index, 0.5]}, "$size"]}, offset]}
+
+    pipeline = [
+        {"$match": {
+            "location.latitude": {"$type": "number"},
+            "location.longitude": {"$type": "number"},
+        }},
+        {"$project": {
+            "fishType": 1,
+            "weight": 1,
+            "lat": "$location.latitude",
+            "lng": "$location.longitude",
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+            "levels": {"$literal": levels},
+        }},
+        {"$unwind": "$levels"},
+        {"$group": {
+            "_id": {
+                "level": "$levels.level",
+                "iy": cell("$lat", 90),
+                "ix": cell("$lng", 180),
+                "fishType": "$fishType",
+                "day": "$day",
+            },
+            "size": {"$first": "$levels.size"},
+            "count": {"$sum": 1},
+            "weight": {"$sum": "$weight"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "level": "$_id.level",
+            "iy": "$_id.iy",
+            "ix": "$_id.ix",
+            "fishType": "$_id.fishType",
+            "day": "$_id.day",
+            "count": 1,
+            "weight": 1,
+            "lat": center("$_id.iy", 90),
+            "lng": center("$_id.ix", 180),
+        }},
+        {"$out": "catch_heatmap"},
+    ]
+    await db.catches.aggregate(pipeline, allowDiskUse=True).to_list(None)
+    return await db.catch_heatmap.estimated_document_count()
+
+
+async def heatmap_tile(db, zoom: int, bbox: List[float], fish_type: Optional[str] = None,
+                       day_from: Optional[str] = None, day_to: Optional[str] = None) -> dict:
+    """Pre-aggregated counts and weights per grid cell inside bbox.
+
+    At most HEATMAP_MAX_CELLS cells, densest first; truncated says whether
+    sparser cells were left out (zoom in to see them).
+    """
+    level = level_for_zoom(zoom)
+    min_lng, min_lat, max_lng, max_lat = bbox
+    query = {
+        "level": level,
+        "lat": {"$gte": min_lat, "$lte": max_lat},
+        "lng": {"$gte": min_lng, "$lte": max_lng},
+        "count": {"$gt": 0},
+    }
+    if fish_type:
+        query["fishType"] = fish_type
+    if day_from or day_to:
+        query["day"] = {}
+        if day_from: query["day"]["$gte"] = day_from
+        if day_to:   query["day"]["$lte"] = day_to
+
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": {"iy": "$iy", "ix": "$ix"},
+            "lat": {"$first": "$lat"},
+            "lng": {"$first": "$lng"},
+            "count": {"$sum": "$count"},
+            "weight": {"$sum": "$weight"},
+        }},
+        # Keep the densest cells; one extra tells us whether any were dropped
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": HEATMAP_MAX_CELLS + 1},
+        {"$project": {"_id": 0, "lat": 1, "lng": 1, "count": 1, "weight": 1}},
+    ]
+    cells = await db.catch_heatmap.aggregate(pipeline).to_list(None)
+    truncated = len(cells) > HEATMAP_MAX_CELLS
+    return {"level": level, "cellSize": HEATMAP_LEVELS[level], "cells": cells[:HEATMAP_MAX_CELLS],
+            "truncated": truncated}
@@ -0,0 +1,229 @@
+import codecs
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from models import CatchCreate
+from routes.catches import new_catch_doc
+
+IMPORT_BATCH_SIZE = 1000
+READ_CHUNK_BYTES = 1 << 20
+# A record that still doesn't parse after this much text is treated as malformed,
+# so one bad record can't make the parser buffer the rest of the file
+MAX_RECORD_BYTES = 1 << 20
+PROGRESS_INTERVAL = 5.0
+
+COORDS_RE = re.compile(r"^\s*Lat:\s*(-?\d+(?:\.\d+)?)\s*,\s*Long:\s*(-?\d+(?:\.\d+)?)\s*$", re.IGNORECASE)
+_decoder = json.JSONDecoder()
+
+
+# ─── Streaming parser ───────────────────────────────────────────────────────────
+
+def iter_records(path: str, offset: int = 0) -> Iterator[Tuple[dict, int]]:
+    """Yield (record, byte offset just past it) from a legacy export.
+
+    Accepts {"catches": [...]} or a bare [...] and never holds more than
+    one read chunk plus one record in memory. A non-zero offset must be a
+    value previously yielded by this function; parsing resumes inside the
+    array from there.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        buf, pos, consumed = "", 0, offset  # consumed = file offset of buf[pos]
+        eof = False
+        in_array = offset > 0
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            chunk = f.read(READ_CHUNK_BYTES)
+            eof = not chunk
+            buf = buf[pos:] + decode.decode(chunk, final=eof)
+            pos = 0
+            return not eof
+
+        def advance(n: int):
+            nonlocal pos, consumed
+            consumed += len(buf[pos:pos + n].encode("utf-8"))
+            pos += n
+
+        while not in_array:
+            start = buf.find("[", pos)
+            if start >= 0:
+                advance(start + 1 - pos)
+                in_array = True
+            else:
+                advance(len(buf) - pos)
+                if not fill():
+                    raise ValueError("No JSON array found in import file")
+
+        while True:
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    advance(1)
+                if pos < len(buf) or not fill():
+                    break
+            if pos >= len(buf) or buf[pos] == "]":
+                return
+
+            try:
+                record, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if len(buf) - pos > MAX_RECORD_BYTES or not fill():
+                    raise ValueError(f"Malformed record at byte {consumed:,}: {e.msg}") from None
+                continue
+            if end == len(buf) and not eof:
+                # A number at the very end of the buffer may continue in the next chunk
+                fill()
+                continue
+            advance(end - pos)
+            yield record, consumed
+
+
+# ─── Normalization ──────────────────────────────────────────────────────────────
+
+def parse_location(value) -> dict:
+    """Legacy "Lat: 13.04, Long: 80.19" strings become coordinates; anything else an address."""
+    if isinstance(value, dict):
+        return value
+    match = COORDS_RE.match(value or "")
+    if match:
+        return {"latitude": float(match.group(1)), "longitude": float(match.group(2)), "address": ""}
+    return {"latitude": None, "longitude": None, "address": (value or "").strip()}
+
+
+def parse_date(record: dict) -> Optional[datetime]:
+    """createdAt (UTC ISO timestamp), falling back to the plain date field."""
+    for field in ("createdAt", "date"):
+        value = record.get(field)
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            continue
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    return None
+
+
+def normalize(record: dict, owner: dict, weight_scale: float = 1.0) -> dict:
+    """Legacy record -> catch document, validated through CatchCreate."""
+    location = parse_location(record.get("location"))
+    has_coords = location.get("latitude") is not None
+    catch = CatchCreate.model_validate({
+        "fishType": (record.get("fishType") or "Unknown").strip(),
+        "quantity": record.get("quantity") or 1,
+        "weight": (record.get("weight") or 0) * weight_scale,
+        # CatchCreate requires coordinates; address-only records get them cleared below
+        "location": location if has_coords else {**location, "latitude": 0, "longitude": 0},
+        "time": record.get("time") or "",
+        "notes": record.get("notes") or "",
+        "idempotencyKey": f"legacy-{record['id']}" if record.get("id") else None,
+    })
+
+    when = parse_date(record) or datetime.utcnow()
+    doc = new_catch_doc(catch, owner, when)
+    if not has_coords:
+        doc["location"] = location
+        doc.pop("geo", None)
+    if record.get("length") is not None:
+        doc["length"] = record["length"]
+    return doc
+
+
+# ─── Import ─────────────────────────────────────────────────────────────────────
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path: str, state: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+async def _insert(db, docs: list) -> Tuple[int, int]:
+    """Unordered insert_many; returns (inserted, duplicates). Duplicates are earlier imports."""
+    try:
+        result = await db.catches.insert_many(docs, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        duplicates = sum(1 for err in errors if err.get("code") == 11000)
+        if duplicates != len(errors):
+            raise
+        return e.details.get("nInserted", 0), duplicates
+
+
+async def import_catches(db, path: str, owner: dict, checkpoint_path: str,
+                         batch_size: int = IMPORT_BATCH_SIZE, weight_scale: float = 1.0,
+                         restart: bool = False) -> dict:
+    """Stream a legacy catches export into the catches collection.
+
+    The checkpoint records the file offset after each committed batch, so
+    a rerun resumes where the last one stopped. Records carry an
+    idempotencyKey derived from the legacy id, so a batch replayed after a
+    crash between insert and checkpoint is skipped as duplicates.
+    """
+    size = os.path.getsize(path)
+    state = {} if restart else load_checkpoint(checkpoint_path)
+    if state and (state.get("path") != os.path.abspath(path) or state.get("offset", 0) > size):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different file; use --restart")
+    state = {"path": os.path.abspath(path), "offset": 0, "records": 0, "inserted": 0,
+             "duplicates": 0, "invalid": 0, **state}
+    if state["offset"]:
+        print(f"↻  Resuming at byte {state['offset']:,} after {state['records']:,} records")
+
+    start_offset, start_records = state["offset"], state["records"]
+    started = last_report = time.perf_counter()
+    batch, batch_end = [], state["offset"]
+
+    async def flush():
+        inserted, duplicates = await _insert(db, batch)
+        state.update(offset=batch_end, inserted=state["inserted"] + inserted,
+                     duplicates=state["duplicates"] + duplicates)
+        save_checkpoint(checkpoint_path, state)
+        batch.clear()
+
+    for record, end in iter_records(path, state["offset"]):
+        state["records"] += 1
+        batch_end = end
+        try:
+            batch.append(normalize(record, owner, weight_scale))
+        except (ValidationError, TypeError, ValueError, AttributeError) as e:
+            state["invalid"] += 1
+            if state["invalid"] <= 10:
+                print(f"⚠️  Skipping record {record.get('id', state['records'])}: {str(e).splitlines()[0]}")
+        if len(batch) >= batch_size:
+            await flush()
+
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            elapsed = now - started
+            print(f"   {state['records']:,} records  {(state['records'] - start_records) / elapsed:,.0f} rec/s  "
+                  f"{(batch_end - start_offset) / elapsed / 1e6:.1f} MB/s  {batch_end / size:.1%}")
+
+    if batch:
+        await flush()
+    else:
+        state["offset"] = batch_end
+        save_checkpoint(checkpoint_path, state)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    state["seconds"] = round(elapsed, 2)
+    state["recordsPerSecond"] = round((state["records"] - start_records) / elapsed, 1)
+    state["megabytesPerSecond"] = round((state["offset"] - start_offset) / elapsed / 1e6, 2)
+    return state
@@ -0,0 +1,174 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo.errors import OperationFailure
+
+# ─── Index registry ─────────────────────────────────────────────────────────────
+# Every index the API relies on, per collection. Applied at startup by
+# ensure_indexes(); add new entries here rather than creating indexes by hand.
+
+INDEXES = {
+    "catches": [
+        # _id is the keyset tie-breaker, so it is part of every feed index
+        # Search filters follow the feed keys so they are checked in the index
+        # without fetching (equality, sort, range); see search.py
+        IndexModel([("userId", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING), ("fishType", ASCENDING),
+                    ("weight", ASCENDING), ("quantity", ASCENDING), ("verified", ASCENDING)],
+                   name="userId_date_id_search"),
+        IndexModel([("fishType", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING),
+                    ("weight", ASCENDING), ("quantity", ASCENDING), ("verified", ASCENDING)],
+                   name="fishType_date_id_search"),
+        IndexModel([("verified", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING),
+                    ("weight", ASCENDING), ("quantity", ASCENDING)], name="verified_date_id_search"),
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date_id"),
+        # "none" skips English stemming and stop words; notes are often Tamil or Malayalam
+        IndexModel([("notes", TEXT), ("location.address", TEXT)], name="notes_address_text",
+                   default_language="none"),
+        IndexModel([("geo", GEOSPHERE), ("date", DESCENDING), ("_id", DESCENDING)], name="geo_date_id"),
+        IndexModel([("userId", ASCENDING), ("idempotencyKey", ASCENDING)], name="userId_idempotencyKey",
+                   unique=True, partialFilterExpression={"idempotencyKey": {"$type": "string"}}),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("licenseId", ASCENDING)], name="licenseId_unique", unique=True, sparse=True),
+        # All-time leaderboards, global and per region
+        IndexModel([("stats.totalWeight", DESCENDING)], name="stats_totalWeight"),
+        IndexModel([("stats.totalCatches", DESCENDING)], name="stats_totalCatches"),
+        IndexModel([("region", ASCENDING), ("stats.totalWeight", DESCENDING)], name="region_stats_totalWeight"),
+        IndexModel([("region", ASCENDING), ("stats.totalCatches", DESCENDING)], name="region_stats_totalCatches"),
+    ],
+    "leaderboard_scores": [
+        IndexModel([("window", ASCENDING), ("period", ASCENDING), ("userId", ASCENDING)],
+                   name="window_period_userId", unique=True),
+        IndexModel([("window", ASCENDING), ("period", ASCENDING), ("weight", DESCENDING)], name="window_period_weight"),
+        IndexModel([("window", ASCENDING), ("period", ASCENDING), ("catches", DESCENDING)], name="window_period_catches"),
+        IndexModel([("window", ASCENDING), ("period", ASCENDING), ("region", ASCENDING), ("weight", DESCENDING)],
+                   name="window_period_region_weight"),
+        IndexModel([("window", ASCENDING), ("period", ASCENDING), ("region", ASCENDING), ("catches", DESCENDING)],
+                   name="window_period_region_catches"),
+    ],
+    "catch_heatmap": [
+        IndexModel([("level", ASCENDING), ("iy", ASCENDING), ("ix", ASCENDING),
+                    ("fishType", ASCENDING), ("day", ASCENDING)], name="cell_fishType_day", unique=True),
+        IndexModel([("level", ASCENDING), ("lat", ASCENDING), ("lng", ASCENDING)], name="level_lat_lng"),
+    ],
+    "catch_rollups": [
+        IndexModel([("userId", ASCENDING), ("granularity", ASCENDING), ("period", ASCENDING),
+                    ("fishType", ASCENDING), ("region", ASCENDING)], name="rollup_key", unique=True),
+    ],
+    "token_transactions": [
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)],
+                   name="userId_createdAt"),
+    ],
+}
+
+# Indexes superseded by the registry above; dropped by ensure_indexes() once
+# their replacements exist
+RETIRED_INDEXES = {
+    "catches": ["userId_date_id", "fishType_date_id"],
+}
+
+# Query shapes issued by the routes, checked with explain() by check_query_plans().
+# Values are placeholders; only the shape matters to the planner.
+FEED_SORT = [("date", DESCENDING), ("_id", DESCENDING)]
+FEED_PAGE = {"$or": [{"date": {"$lt": datetime(2026, 1, 1)}},
+                     {"date": datetime(2026, 1, 1), "_id": {"$lt": ObjectId()}}]}
+
+QUERY_SHAPES = [
+    {"name": "catches.get_catches", "collection": "catches",
+     "filter": {"userId": "u"}, "sort": FEED_SORT},
+    {"name": "catches.get_catches[fishType]", "collection": "catches",
+     "filter": {"userId": "u", "fishType": "f"}, "sort": FEED_SORT},
+    {"name": "catches.get_catches[cursor]", "collection": "catches",
+     "filter": {"userId": "u", **FEED_PAGE}, "sort": FEED_SORT},
+    {"name": "catches.get_all_catches", "collection": "catches",
+     "filter": {}, "sort": FEED_SORT},
+    {"name": "catches.get_all_catches[fishType]", "collection": "catches",
+     "filter": {"fishType": "f"}, "sort": FEED_SORT},
+    {"name": "catches.get_all_catches[cursor]", "collection": "catches",
+     "filter": FEED_PAGE, "sort": FEED_SORT},
+    {"name": "catches.export", "collection": "catches",
+     "filter": {"userId": "u", "date": {"$gte": datetime(2026, 1, 1), "$lt": datetime(2026, 4, 1)}},
+     "sort": [("date", ASCENDING), ("_id", ASCENDING)]},
+    {"name": "catches.batch[duplicates]", "collection": "catches",
+     "filter": {"userId": "u", "idempotencyKey": {"$in": ["k"]}}},
+    {"name": "catches.nearby", "collection": "catches",
+     "filter": {"geo": {"$geoWithin": {"$centerSphere": [[80.2, 13.0], 0.001]}}}, "sort": FEED_SORT},
+    {"name": "catches.heatmap", "collection": "catch_heatmap",
+     "filter": {"level": 2, "lat": {"$gte": 12.0, "$lte": 14.0}, "lng": {"$gte": 79.0, "$lte": 81.0},
+                "count": {"$gt": 0}}},
+    {"name": "catches.get_stats", "collection": "catch_rollups",
+     "filter": {"userId": "u", "granularity": "day",
+                "period": {"$gte": datetime(2026, 1, 1), "$lt": datetime(2026, 2, 1)}}},
+    {"name": "catches.search[userId]", "collection": "catches",
+     "filter": {"userId": "u", "weight": {"$gte": 10}, "date": {"$gte": datetime(2026, 1, 1)}}, "sort": FEED_SORT},
+    {"name": "catches.search[fishType]", "collection": "catches",
+     "filter": {"fishType": "f", "quantity": {"$lte": 5}, "verified": True}, "sort": FEED_SORT},
+    {"name": "catches.search[verified]", "collection": "catches",
+     "filter": {"verified": True, "weight": {"$gte": 10, "$lte": 50}}, "sort": FEED_SORT},
+    {"name": "catches.search[text]", "collection": "catches",
+     "filter": {"$text": {"$search": "kasimedu"}, "verified": True}, "sort": FEED_SORT},
+    {"name": "auth.email", "collection": "users",
+     "filter": {"email": "e"}},
+    {"name": "auth.licenseId", "collection": "users",
+     "filter": {"licenseId": "l"}},
+    {"name": "auth.update_me[licenseId]", "collection": "users",
+     "filter": {"licenseId": "l", "_id": {"$ne": ObjectId()}}},
+    {"name": "leaderboard.all", "collection": "users",
+     "filter": {"region": "r", "stats.totalWeight": {"$gt": 0}}, "sort": [("stats.totalWeight", DESCENDING)]},
+    {"name": "leaderboard.all.my_rank", "collection": "users",
+     "filter": {"stats.totalCatches": {"$gt": 10}}},
+    {"name": "leaderboard.week", "collection": "leaderboard_scores",
+     "filter": {"window": "week", "period": datetime(2026, 1, 5), "weight": {"$gt": 0}},
+     "sort": [("weight", DESCENDING)]},
+    {"name": "leaderboard.week.my_rank", "collection": "leaderboard_scores",
+     "filter": {"window": "week", "period": datetime(2026, 1, 5), "region": "r", "catches": {"$gt": 3}}},
+    {"name": "auth.token_history", "collection": "token_transactions",
+     "filter": {"userId": "u"}, "sort": [("createdAt", DESCENDING), ("_id", DESCENDING)]},
+]
+
+
+async def ensure_indexes(db):
+    """Create every registered index. Conflicts are reported, not fatal."""
+    failed = set()
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            failed.add(collection)
+            print(f"⚠️  Could not create indexes on {collection}: {e}")
+    for collection, names in RETIRED_INDEXES.items():
+        if collection in failed:
+            continue  # keep the old indexes until their replacements exist
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                print(f"   Dropped retired index {collection}.{name}")
+    print("✅ Indexes ensured")
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def check_query_plans(db) -> list:
+    """Explain each registered query shape; return the ones that COLLSCAN."""
+    failures = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explain = await cursor.limit(1).explain()
+        stages = list(_plan_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            failures.append((shape["name"], stages))
+    return failures
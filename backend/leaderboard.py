@@ -0,0 +1,293 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from database import get_db
+from rollups import period_start
+
+load_dotenv()
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_RECONCILE_SECONDS = float(os.getenv("LEADERBOARD_RECONCILE_SECONDS", "60"))
+# region is free text from the client, so boards are capped and evicted least recently read first
+LEADERBOARD_MAX_BOARDS = int(os.getenv("LEADERBOARD_MAX_BOARDS", "512"))
+
+WINDOWS = ("week", "month", "all")
+METRICS = ("weight", "catches")
+
+# All-time boards read the per-user stats counters on users; week and
+# month boards read per-period totals kept in leaderboard_scores.
+ALL_TIME_FIELDS = {"weight": "stats.totalWeight", "catches": "stats.totalCatches"}
+
+
+class TopK:
+    """The K highest scores of one leaderboard, kept in process.
+
+    Scores are updated as catches are written. If a listed user drops
+    below the lowest listed score, someone outside the list may now
+    outrank them, so the board is marked stale and reloaded on next read.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.entries = {}
+        self.stale = True
+        self.read = False  # set by top(), cleared by each reconcile
+        self._ranked = None
+
+    def load(self, rows: Iterable[dict]):
+        self.entries = {r["userId"]: r for r in rows}
+        self.stale = False
+        self._ranked = None
+
+    def update(self, user_id: str, name: str, score: float):
+        if self.stale:
+            return
+        floor = min((e["score"] for e in self.entries.values()), default=0)
+        full = len(self.entries) >= self.k
+        if user_id in self.entries:
+            if full and score < floor:
+                self.stale = True
+                return
+        elif full and score <= floor:
+            return
+        self.entries[user_id] = {"userId": user_id, "name": name, "score": score}
+        if len(self.entries) > self.k:
+            lowest = min(self.entries.values(), key=lambda e: e["score"])
+            del self.entries[lowest["userId"]]
+        self._ranked = None
+
+    def ranked(self) -> list:
+        if self._ranked is None:
+            ordered = sorted(self.entries.values(), key=lambda e: (-e["score"], e["userId"]))
+            self._ranked = [{"rank": i + 1, **e} for i, e in enumerate(ordered) if e["score"] > 0]
+        return self._ranked
+
+
+def current_period(window: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    if window == "all":
+        return None
+    return period_start(now or datetime.utcnow(), window)
+
+
+def _score_query(window: str, period: Optional[datetime], region: Optional[str]):
+    """(collection, base filter) holding one leaderboard's scores."""
+    db = get_db()
+    if window == "all":
+        return db.users, ({"region": region} if region else {})
+    query = {"window": window, "period": period}
+    if region:
+        query["region"] = region
+    return db.leaderboard_scores, query
+
+
+def _score_field(window: str, metric: str) -> str:
+    return ALL_TIME_FIELDS[metric] if window == "all" else metric
+
+
+def _row(window: str, metric: str, doc: dict) -> dict:
+    if window == "all":
+        stats = doc.get("stats") or {}
+        score = stats.get("totalWeight" if metric == "weight" else "totalCatches", 0)
+        return {"userId": str(doc["_id"]), "name": doc.get("name", ""), "score": score}
+    return {"userId": doc["userId"], "name": doc.get("userName", ""), "score": doc.get(metric, 0)}
+
+
+class Leaderboards:
+    def __init__(self, k: int, reconcile_seconds: float, max_boards: int):
+        self.k = k
+        self.reconcile_seconds = reconcile_seconds
+        self.max_boards = max_boards
+        self.boards = OrderedDict()
+        self._task = None
+
+    def _board(self, window, period, region, metric) -> TopK:
+        key = (window, period, region, metric)
+        board = self.boards.get(key)
+        if board is None:
+            board = self.boards[key] = TopK(self.k)
+            while len(self.boards) > self.max_boards:
+                self.boards.popitem(last=False)
+        self.boards.move_to_end(key)
+        board.read = True
+        return board
+
+    async def _load(self, key, board: TopK):
+        window, period, region, metric = key
+        collection, query = _score_query(window, period, region)
+        field = _score_field(window, metric)
+        docs = await collection.find(
+            {**query, field: {"$gt": 0}}, {"name": 1, "userName": 1, "userId": 1, "stats": 1, metric: 1}
+        ).sort(field, -1).limit(self.k).to_list(self.k)
+        board.load(_row(window, metric, d) for d in docs)
+
+    async def top(self, window: str, region: Optional[str], metric: str, limit: int) -> list:
+        key = (window, current_period(window), region, metric)
+        board = self._board(*key)
+        if board.stale:
+            await self._load(key, board)
+        return board.ranked()[:limit]
+
+    async def my_rank(self, user_id, window: str, region: Optional[str], metric: str) -> dict:
+        """Rank is one more than the number of higher scores, counted on an index."""
+        period = current_period(window)
+        collection, query = _score_query(window, period, region)
+        field = _score_field(window, metric)
+        if window == "all":
+            doc = await collection.find_one({"_id": user_id}, {"name": 1, "stats": 1})
+        else:
+            doc = await collection.find_one({**query, "userId": str(user_id)})
+        score = _row(window, metric, doc)["score"] if doc else 0
+        if not score:
+            return {"rank": None, "score": 0}
+        higher = await collection.count_documents({**query, field: {"$gt": score}})
+        return {"rank": higher + 1, "score": score}
+
+    def _update_boards(self, window, period, region, user_id, name, totals: dict):
+        for metric in METRICS:
+            for board_region in {None, region}:
+                board = self.boards.get((window, period, board_region, metric))
+                if board is not None:
+                    board.update(user_id, name, totals.get(metric, 0))
+
+    async def apply_change(self, db, user: Optional[dict], added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+        """Update per-period scores and the in-process boards after a catch write.
+
+        `user` is the stats post-image from apply_stats_changes, used for the
+        all-time boards.
+        """
+        if user:
+            stats = user.get("stats") or {}
+            self._update_boards("all", None, user.get("region"), str(user["_id"]), user.get("name", ""),
+                                {"weight": stats.get("totalWeight", 0), "catches": stats.get("totalCatches", 0)})
+
+        deltas = {}
+        for docs, sign in ((added, 1), (removed, -1)):
+            for c in docs:
+                if not c.get("date"):
+                    continue
+                for window in ("week", "month"):
+                    key = (window, period_start(c["date"], window), c.get("userId"))
+                    d = deltas.setdefault(key, {"weight": 0, "catches": 0, "region": c.get("region"),
+                                                "userName": c.get("userName", "")})
+                    d["weight"] += sign * (c.get("weight") or 0)
+                    d["catches"] += sign
+
+        for (window, period, user_id), d in deltas.items():
+            if not d["weight"] and not d["catches"]:
+                continue
+            doc = await db.leaderboard_scores.find_one_and_update(
+                {"window": window, "period": period, "userId": user_id},
+                {"$inc": {"weight": d["weight"], "catches": d["catches"]},
+                 "$set": {"region": d["region"], "userName": d["userName"]}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self._update_boards(window, period, d["region"], user_id, d["userName"],
+                                {"weight": doc.get("weight", 0), "catches": doc.get("catches", 0)})
+
+    async def reconcile(self):
+        """Reload every board read since the last pass; forget idle boards and past periods.
+
+        A forgotten board is simply reloaded on its next read.
+        """
+        for key in list(self.boards):
+            window, period = key[0], key[1]
+            board = self.boards.get(key)
+            if board is None:
+                continue  # evicted while an earlier board was loading
+            if period != current_period(window) or not board.read:
+                del self.boards[key]
+                continue
+            board.read = False
+            await self._load(key, board)
+
+    def invalidate(self):
+        """Mark every board stale so it reloads from Mongo on its next read."""
+        for board in self.boards.values():
+            board.stale = True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_seconds)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"⚠️  Leaderboard reconciliation failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _scores_pipeline(match: dict) -> list:
+    """Week and month totals per user from catches, shaped like leaderboard_scores."""
+    return [
+        {"$match": {**match, "date": {"$type": "date"}}},
+        {"$sort": {"date": 1}},
+        {"$project": {
+            "userId": 1, "userName": 1, "region": 1, "weight": 1, "date": 1,
+            "window": {"$literal": ["week", "month"]},
+        }},
+        {"$unwind": "$window"},
+        {"$group": {
+            "_id": {
+                "window": "$window",
+                "period": {"$dateTrunc": {"date": "$date", "unit": "$window", "startOfWeek": "monday"}},
+                "userId": "$userId",
+            },
+            "weight": {"$sum": {"$ifNull": ["$weight", 0]}},
+            "catches": {"$sum": 1},
+            # Latest catch wins, as with the $set in apply_change
+            "region": {"$last": "$region"},
+            "userName": {"$last": "$userName"},
+        }},
+        {"$project": {
+            "_id": 0, "window": "$_id.window", "period": "$_id.period", "userId": "$_id.userId",
+            "weight": 1, "catches": 1, "region": 1, "userName": 1,
+        }},
+    ]
+
+
+async def rebuild_leaderboard_scores(db, user_ids: Optional[Iterable[str]] = None) -> int:
+    """Regenerate leaderboard_scores from catches.
+
+    Without user_ids the whole collection is replaced ($out); with them only
+    those users' scores are deleted and recomputed ($merge on the unique key).
+    """
+    if user_ids is None:
+        await db.catches.aggregate(
+            _scores_pipeline({}) + [{"$out": "leaderboard_scores"}], allowDiskUse=True
+        ).to_list(None)
+        return await db.leaderboard_scores.estimated_document_count()
+
+    user_ids = [str(u) for u in user_ids]
+    await db.leaderboard_scores.delete_many({"userId": {"$in": user_ids}})
+    await db.catches.aggregate(_scores_pipeline({"userId": {"$in": user_ids}}) + [{"$merge": {
+        "into": "leaderboard_scores", "on": ["window", "period", "userId"],
+        "whenMatched": "replace", "whenNotMatched": "insert",
+    }}], allowDiskUse=True).to_list(None)
+    return await db.leaderboard_scores.count_documents({"userId": {"$in": user_ids}})
+
+
+async def ensure_leaderboard_scores(db):
+    """Build leaderboard_scores on first deploy, when catches exist but no scores do."""
+    if await db.leaderboard_scores.find_one({}, {"_id": 1}) or not await db.catches.find_one({}, {"_id": 1}):
+        return
+    docs = await rebuild_leaderboard_scores(db)
+    print(f"✅ Built leaderboard scores from existing catches: {docs} documents")
+
+
+leaderboards = Leaderboards(LEADERBOARD_SIZE, LEADERBOARD_RECONCILE_SECONDS, LEADERBOARD_MAX_BOARDS)
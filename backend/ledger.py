@@ -0,0 +1,90 @@
+import asyncio
+import os
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+from dotenv import load_dotenv
+from database import get_db
+
+load_dotenv()
+
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", "100"))
+LEDGER_FLUSH_INTERVAL = float(os.getenv("LEDGER_FLUSH_INTERVAL", "0.5"))
+
+
+class LedgerWriter:
+    """Buffers token_transactions entries and appends them with insert_many.
+
+    Entries are flushed when the buffer reaches batch_size, every
+    flush_interval seconds, before history is read, and on shutdown.
+    Each entry gets its _id up front, so re-sending a batch after a partial
+    failure cannot write an entry twice.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._stopping = asyncio.Event()
+        self._flushes = set()  # early flushes started by record(); held so they aren't collected
+
+    def record(self, entry: dict):
+        entry.setdefault("_id", ObjectId())
+        self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size:
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            try:
+                await get_db().token_transactions.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys were written by an earlier attempt; retry the rest
+                failed = [batch[err["index"]] for err in e.details.get("writeErrors", [])
+                          if err.get("code") != 11000]
+                self._requeue(failed, e)
+            except PyMongoError as e:
+                self._requeue(batch, e)
+
+    def _requeue(self, entries: list, error: Exception):
+        if entries:
+            self._buffer = entries + self._buffer
+            print(f"⚠️  Token ledger flush failed, {len(self._buffer)} entries pending: {error}")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Let the loop finish its current insert rather than cancelling it; the
+        balances for a batch taken from _buffer are already committed."""
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"⚠️  Token ledger writer stopped with an error: {e}")
+            self._task = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+
+ledger = LedgerWriter(LEDGER_BATCH_SIZE, LEDGER_FLUSH_INTERVAL)
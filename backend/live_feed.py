@@ -0,0 +1,186 @@
+import asyncio
+import os
+from typing import Iterable, List, Optional
+from dotenv import load_dotenv
+from responses import dumps
+from metrics import LIVE_SUBSCRIBERS, LIVE_DROPPED
+
+load_dotenv()
+
+# "local" fans out inside this worker only; "changestream" tails the catches
+# collection so every worker sees every write (needs a replica set)
+LIVE_FEED_BACKEND = os.getenv("LIVE_FEED_BACKEND", "local")
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "1000"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+# Pushed to a subscriber in place of events it was too slow to take
+LAGGED = object()
+
+
+def _catch_payload(c: dict) -> dict:
+    from routes.catches import catch_to_dict  # routes.catches imports this module
+    return catch_to_dict(c)
+
+
+class Subscription:
+    """One connected client: its filters and a bounded queue of encoded events."""
+
+    def __init__(self, fish_type: Optional[str], bbox: Optional[List[float]]):
+        self.fish_type = fish_type
+        self.bbox = bbox
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+
+    def wants(self, event: dict) -> bool:
+        c = event["catch"]
+        if event["type"] == "deleted" and "fishType" not in c:
+            return True  # change stream deletes carry only the id
+        if self.fish_type and c.get("fishType") != self.fish_type:
+            return False
+        if self.bbox:
+            loc = c.get("location") or {}
+            lat, lng = loc.get("latitude"), loc.get("longitude")
+            if lat is None or lng is None:
+                return False
+            min_lng, min_lat, max_lng, max_lat = self.bbox
+            return min_lng <= lng <= max_lng and min_lat <= lat <= max_lat
+        return True
+
+    def push(self, item) -> bool:
+        """Queue an item; a full queue is replaced by LAGGED and the client dropped."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+            return False
+
+
+class Broadcaster:
+    """Fans catch events out to live feed subscribers in this worker.
+
+    Each event is encoded once; subscribers only receive references. A
+    subscriber that falls LIVE_QUEUE_SIZE events behind is told it lagged
+    and disconnected, so one slow phone can't grow memory without bound.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.sequence = 0
+
+    def subscribe(self, fish_type: Optional[str] = None, bbox: Optional[List[float]] = None) -> Optional[Subscription]:
+        if len(self.subscribers) >= LIVE_MAX_SUBSCRIBERS:
+            return None
+        sub = Subscription(fish_type, bbox)
+        self.subscribers.add(sub)
+        LIVE_SUBSCRIBERS.set(len(self.subscribers))
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.subscribers.discard(sub)
+        LIVE_SUBSCRIBERS.set(len(self.subscribers))
+
+    def deliver(self, events: Iterable[dict]):
+        for event in events:
+            self.sequence += 1
+            encoded = f"id: {self.sequence}\nevent: {event['type']}\ndata: ".encode() + dumps(event["catch"]) + b"\n\n"
+            for sub in list(self.subscribers):
+                if sub.wants(event) and not sub.push(encoded):
+                    LIVE_DROPPED.inc()
+                    self.unsubscribe(sub)
+
+    def close_all(self):
+        for sub in list(self.subscribers):
+            sub.push(None)
+            self.unsubscribe(sub)
+
+
+def catch_events(added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> List[dict]:
+    """created/updated/deleted events from the added/removed lists given to on_catches_changed."""
+    added_by_id = {c["_id"]: c for c in added if "_id" in c}
+    events = []
+    for c in removed:
+        if c.get("_id") not in added_by_id:
+            events.append({"type": "deleted", "catch": _catch_payload(c)})
+    removed_ids = {c.get("_id") for c in removed}
+    for _id, c in added_by_id.items():
+        events.append({"type": "updated" if _id in removed_ids else "created", "catch": _catch_payload(c)})
+    return events
+
+
+# ─── Fan-out backends ───────────────────────────────────────────────────────────
+
+class LocalFanout:
+    """Writes in this worker go straight to this worker's subscribers."""
+
+    def __init__(self, broadcaster: Broadcaster):
+        self.broadcaster = broadcaster
+
+    def publish(self, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+        self.broadcaster.deliver(catch_events(added, removed))
+
+    def start(self, db):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class ChangeStreamFanout:
+    """Every worker tails the catches change stream, so writes made by any
+    worker reach every subscriber. Local publishes are ignored to avoid
+    delivering twice.
+    """
+
+    def __init__(self, broadcaster: Broadcaster):
+        self.broadcaster = broadcaster
+        self._task = None
+
+    def publish(self, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+        pass
+
+    def start(self, db):
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self, db):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        resume_token = None
+        while True:
+            try:
+                async with db.catches.watch(pipeline, full_document="updateLookup",
+                                            resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.broadcaster.deliver([self._event(change)])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Live feed change stream failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def _event(change: dict) -> dict:
+        op = change["operationType"]
+        if op == "delete" or not change.get("fullDocument"):
+            return {"type": "deleted", "catch": {"id": str(change["documentKey"]["_id"])}}
+        return {"type": "created" if op == "insert" else "updated", "catch": _catch_payload(change["fullDocument"])}
+
+
+broadcaster = Broadcaster()
+fanout = ChangeStreamFanout(broadcaster) if LIVE_FEED_BACKEND == "changestream" else LocalFanout(broadcaster)
+
+
+def start(db):
+    fanout.start(db)
+
+
+async def stop():
+    await fanout.stop()
+    broadcaster.close_all()
@@ -1,14 +1,45 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import connect_db, close_db
-from routes import auth, catches
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+import asyncio
+import os
+from database import connect_db, warm_up, close_db, get_db
+from indexes import ensure_indexes
+from user_cache import user_cache
+from feed_cache import feed_cache
+from auth_utils import shutdown_hash_pool
+from ledger import ledger
+from leaderboard import leaderboards, ensure_leaderboard_scores
+from rollups import ensure_rollups
+import live_feed
+from side_effects import side_effect_queue
+from metrics import MetricsMiddleware
+from ratelimit import ConcurrencyLimitMiddleware
+from responses import FastJSONResponse
+from routes import auth, catches, leaderboard, photos, species
+
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "1.0"))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_db()
+    await warm_up()
+    await ensure_indexes(get_db())
+    await ensure_rollups(get_db())
+    await ensure_leaderboard_scores(get_db())
+    ledger.start()
+    leaderboards.start()
+    side_effect_queue.start()
+    live_feed.start(get_db())
     yield
+    await live_feed.stop()
+    # Flush queued side effects while the leaderboards and database are still up
+    await side_effect_queue.stop()
+    await leaderboards.stop()
+    await ledger.stop()
     await close_db()
+    shutdown_hash_pool()
 
 app = FastAPI(
     title="Fishnet API",
@@ -26,9 +57,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ConcurrencyLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(catches.router, prefix="/api/catches", tags=["Catches"])
+app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["Leaderboard"])
+app.include_router(photos.router, prefix="/api/photos", tags=["Photos"])
+app.include_router(species.router, prefix="/api/species", tags=["Species"])
 
 @app.get("/")
 async def root():
@@ -36,4 +73,20 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    """Pings MongoDB so load balancers stop routing to an instance that lost it."""
+    try:
+        await asyncio.wait_for(get_db().command("ping"), timeout=HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        reason = "timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+        return FastJSONResponse({"status": "error", "database": reason}, status_code=503)
+    return {"status": "ok", "database": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"success": True, "data": {"users": user_cache.stats(), "feed": feed_cache.stats()}}
@@ -0,0 +1,210 @@
+"""Admin commands for the Fishnet backend.
+
+    python manage.py rebuild-stats
+    python manage.py ensure-indexes
+    python manage.py check-indexes
+    python manage.py backfill-geo
+    python manage.py rebuild-heatmap
+    python manage.py rebuild-rollups
+    python manage.py check-rollups
+    python manage.py rebuild-leaderboards
+    python manage.py migrate-photos
+    python manage.py import-catches data/catches.json --user someone@example.com
+    python manage.py normalize-species
+"""
+import argparse
+import asyncio
+import sys
+from database import connect_db, close_db, get_db
+from catch_stats import rebuild_user_stats
+from indexes import ensure_indexes, check_query_plans
+from geo import backfill_geo
+from heatmap import rebuild_heatmap
+from rollups import rebuild_rollups, check_rollups
+from leaderboard import rebuild_leaderboard_scores
+from photos import migrate_inline_photos
+from importer import import_catches
+from species import normalize_catch_species
+
+
+async def rebuild_stats(args) -> int:
+    users = await rebuild_user_stats(get_db())
+    print(f"✅ Rebuilt stats for {users} users with catches")
+    return 0
+
+
+async def create_indexes(args) -> int:
+    await ensure_indexes(get_db())
+    return 0
+
+
+async def check_indexes(args) -> int:
+    db = get_db()
+    await ensure_indexes(db)
+    failures = await check_query_plans(db)
+    for name, stages in failures:
+        print(f"❌ {name} falls back to COLLSCAN: {' -> '.join(stages)}")
+    if failures:
+        return 1
+    print("✅ Every query shape uses an index")
+    return 0
+
+
+async def backfill_geo_points(args) -> int:
+    updated = await backfill_geo(get_db())
+    print(f"✅ Added GeoJSON points to {updated} catches")
+    return 0
+
+
+async def rebuild_heatmap_rollup(args) -> int:
+    db = get_db()
+    cells = await rebuild_heatmap(db)
+    await ensure_indexes(db)
+    print(f"✅ Rebuilt catch heatmap: {cells} cells")
+    return 0
+
+
+async def rebuild_catch_rollups(args) -> int:
+    db = get_db()
+    docs = await rebuild_rollups(db)
+    await ensure_indexes(db)
+    print(f"✅ Rebuilt catch rollups: {docs} documents")
+    return 0
+
+
+async def check_catch_rollups(args) -> int:
+    def totals(doc):
+        return doc and {f: doc.get(f) for f in ("count", "quantity", "weight")}
+
+    mismatches = await check_rollups(get_db())
+    for m in mismatches[:args.show]:
+        print(f"❌ {m['key']}: expected {totals(m['expected'])}, stored {totals(m['actual'])}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} rollup documents disagree with catches; run rebuild-rollups")
+        return 1
+    print("✅ Rollups match a full aggregation of catches")
+    return 0
+
+
+async def rebuild_leaderboards(args) -> int:
+    db = get_db()
+    docs = await rebuild_leaderboard_scores(db)
+    await ensure_indexes(db)
+    print(f"✅ Rebuilt week and month leaderboard scores: {docs} documents")
+    return 0
+
+
+async def migrate_photos(args) -> int:
+    result = await migrate_inline_photos(get_db())
+    print(f"✅ Moved {result['migrated']} inline profile photos to the photo store "
+          f"({result['skipped']} left as they are)")
+    return 0
+
+
+async def import_legacy_catches(args) -> int:
+    db = get_db()
+    owner = {"_id": "anonymous", "name": "Fisher"}
+    if args.user:
+        owner = await db.users.find_one({"email": args.user.lower()}, {"name": 1, "region": 1})
+        if not owner:
+            print(f"❌ No user with email {args.user}")
+            return 1
+
+    # The idempotencyKey index is what makes a replayed batch harmless
+    await ensure_indexes(db)
+    try:
+        result = await import_catches(
+            db, args.path, owner, args.checkpoint or f"{args.path}.checkpoint.json",
+            batch_size=args.batch_size, weight_scale=args.weight_scale, restart=args.restart,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Imported {result['inserted']:,} of {result['records']:,} records in {result['seconds']}s "
+          f"({result['recordsPerSecond']:,} rec/s, {result['megabytesPerSecond']} MB/s); "
+          f"{result['duplicates']:,} already imported, {result['invalid']:,} invalid")
+
+    if not args.skip_rebuild:
+        if args.user:
+            await rebuild_user_stats(db, owner["_id"])
+        await rebuild_rollups(db)
+        await rebuild_heatmap(db)
+        await rebuild_leaderboard_scores(db)
+        await ensure_indexes(db)
+        print("✅ Rebuilt stats, rollups, heatmap and leaderboards")
+    return 0
+
+
+async def normalize_species(args) -> int:
+    db = get_db()
+    updated = await normalize_catch_species(db)
+    print(f"✅ Resolved fishType to a canonical species on {updated} catches")
+    if updated:
+        await rebuild_user_stats(db)
+        await rebuild_rollups(db)
+        await rebuild_heatmap(db)
+        await rebuild_leaderboard_scores(db)
+        await ensure_indexes(db)
+        print("✅ Rebuilt stats, rollups, heatmap and leaderboards")
+    return 0
+
+
+async def run(args) -> int:
+    await connect_db()
+    try:
+        return await args.func(args)
+    finally:
+        await close_db()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fishnet backend admin commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-stats", help="Recompute every user's catch stats from the catches collection")
+    p.set_defaults(func=rebuild_stats)
+
+    p = sub.add_parser("ensure-indexes", help="Create every index in the registry")
+    p.set_defaults(func=create_indexes)
+
+    p = sub.add_parser("check-indexes", help="Explain each route's query shape and fail on COLLSCAN")
+    p.set_defaults(func=check_indexes)
+
+    p = sub.add_parser("backfill-geo", help="Add GeoJSON points to catches stored before the geo field")
+    p.set_defaults(func=backfill_geo_points)
+
+    p = sub.add_parser("rebuild-heatmap", help="Regenerate the catch_heatmap rollup from catches")
+    p.set_defaults(func=rebuild_heatmap_rollup)
+
+    p = sub.add_parser("rebuild-rollups", help="Regenerate catch_rollups from catches")
+    p.set_defaults(func=rebuild_catch_rollups)
+
+    p = sub.add_parser("check-rollups", help="Compare catch_rollups against a full aggregation")
+    p.add_argument("--show", type=int, default=20, help="mismatches to print")
+    p.set_defaults(func=check_catch_rollups)
+
+    p = sub.add_parser("rebuild-leaderboards", help="Regenerate week and month leaderboard scores from catches")
+    p.set_defaults(func=rebuild_leaderboards)
+
+    p = sub.add_parser("migrate-photos", help="Move inline profile photos out of user documents")
+    p.set_defaults(func=migrate_photos)
+
+    p = sub.add_parser("import-catches", help="Stream a legacy catches.json export into MongoDB")
+    p.add_argument("path", help="legacy export, {\"catches\": [...]} or a JSON array")
+    p.add_argument("--user", help="email of the user the catches belong to (default: anonymous)")
+    p.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many")
+    p.add_argument("--checkpoint", help="checkpoint file (default: <path>.checkpoint.json)")
+    p.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    p.add_argument("--weight-scale", type=float, default=1.0, help="multiply legacy weights, e.g. 0.001 for grams")
+    p.add_argument("--skip-rebuild", action="store_true", help="don't rebuild stats, rollups and heatmap afterwards")
+    p.set_defaults(func=import_legacy_catches)
+
+    p = sub.add_parser("normalize-species", help="Rewrite stored fishType values to canonical species names")
+    p.set_defaults(func=normalize_species)
+
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
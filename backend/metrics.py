@@ -0,0 +1,156 @@
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+from auth_utils import hash_queue_depth
+from user_cache import user_cache
+from feed_cache import feed_cache
+
+# ─── Metric registry ────────────────────────────────────────────────────────────
+# Everything here is exported by GET /metrics in the Prometheus text format.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUESTS = Counter(
+    "fishnet_http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "fishnet_http_request_duration_seconds", "Time to produce an HTTP response",
+    ["method", "route"], buckets=LATENCY_BUCKETS)
+
+MONGO_LATENCY = Histogram(
+    "fishnet_mongo_command_duration_seconds", "MongoDB command round-trip time",
+    ["collection", "command"], buckets=LATENCY_BUCKETS)
+MONGO_FAILURES = Counter(
+    "fishnet_mongo_command_failures_total", "MongoDB commands that returned an error",
+    ["collection", "command"])
+MONGO_CHECKOUT_WAIT = Histogram(
+    "fishnet_mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=LATENCY_BUCKETS)
+
+RATE_LIMITED = Counter(
+    "fishnet_rate_limited_total", "Requests rejected with 429 by a rate limit budget", ["budget"])
+SHED_REQUESTS = Counter(
+    "fishnet_shed_requests_total", "Requests rejected with 503 by the concurrency cap")
+IN_FLIGHT = Gauge("fishnet_http_requests_in_flight", "Requests currently being handled")
+
+SIDE_EFFECT_QUEUE_DEPTH = Gauge(
+    "fishnet_side_effect_queue_depth", "Catch changes waiting for stats, rollups and leaderboards")
+SIDE_EFFECT_FLUSH = Histogram(
+    "fishnet_side_effect_flush_seconds", "Time to apply one batch of queued side effects",
+    buckets=LATENCY_BUCKETS)
+
+LIVE_SUBSCRIBERS = Gauge("fishnet_live_feed_subscribers", "Open live catch feed connections")
+LIVE_DROPPED = Counter("fishnet_live_feed_dropped_total", "Live feed clients disconnected for falling behind")
+
+BCRYPT_QUEUE = Gauge("fishnet_bcrypt_queue_depth", "Password hashes queued or running in the hash pool")
+BCRYPT_QUEUE.set_function(hash_queue_depth)
+
+CACHE_HIT_RATIO = Gauge("fishnet_cache_hit_ratio", "Lifetime hit ratio of in-process caches", ["cache"])
+CACHE_HIT_RATIO.labels("users").set_function(lambda: user_cache.stats()["hitRatio"])
+CACHE_HIT_RATIO.labels("feed").set_function(lambda: feed_cache.stats()["hitRatio"])
+
+
+# ─── HTTP ───────────────────────────────────────────────────────────────────────
+
+def route_label(scope) -> str:
+    """Path with parameter values swapped back for their names: /api/catches/{catch_id}."""
+    if scope.get("route") is None:
+        return "unmatched"
+    names = {str(v): k for k, v in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{names[s]}}}" if s in names else s for s in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """Count and time every HTTP request, labelled by route template.
+
+    Labelling by route template rather than raw path keeps cardinality
+    bounded; requests that match no route share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            label = route_label(scope)
+            HTTP_LATENCY.labels(scope["method"], label).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(scope["method"], label, str(status)).inc()
+
+
+# ─── MongoDB ────────────────────────────────────────────────────────────────────
+
+# Driver handshakes and heartbeats, not application queries
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "endSessions"}
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Record command latency per collection and command name.
+
+    Only the started event carries the command document, so the collection
+    is remembered by request id until the matching succeeded/failed event.
+    """
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            # getMore names the cursor id here; the collection is a separate field
+            target = event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = target
+
+    def _finish(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), None)
+        if collection is None:
+            return None
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        if collection is not None:
+            MONGO_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """Record how long operations wait to check a connection out of the pool."""
+
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", None)  # pymongo 4.7+
+        if duration is not None:
+            MONGO_CHECKOUT_WAIT.observe(duration)
+
+    # The remaining pool events are not needed
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+def mongo_listeners() -> list:
+    return [CommandTimer(), PoolTimer()]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 
@@ -45,8 +45,8 @@ class TokenTransaction(BaseModel):
 # ─── Catch Models ──────────────────────────────────────────────────────────────
 
 class Location(BaseModel):
-    latitude: float
-    longitude: float
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
     address: Optional[str] = ""
 
 
@@ -66,6 +66,13 @@ class CatchCreate(BaseModel):
     userName: Optional[str] = "Fisher"
     notes: Optional[str] = ""
     weather: Optional[WeatherInfo] = None
+    # Client-generated key; a retried upload with the same key is not stored twice
+    idempotencyKey: Optional[str] = Field(None, max_length=128)
+
+
+class CatchBatch(BaseModel):
+    # Items are validated one by one so a bad item doesn't reject the batch
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
 
 
 class CatchUpdate(BaseModel):
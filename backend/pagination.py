@@ -0,0 +1,36 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def encode_cursor(value: datetime, _id: ObjectId) -> str:
+    """Opaque keyset cursor for the (value, _id) of the last item on a page."""
+    raw = f"{value.isoformat()}|{_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, _id = raw.split("|")
+        return datetime.fromisoformat(value), ObjectId(_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(field: str, cursor: Optional[str]) -> dict:
+    """Filter for items after the cursor when sorting by (field, _id) descending."""
+    if not cursor:
+        return {}
+    value, _id = decode_cursor(cursor)
+    return {"$or": [{field: {"$lt": value}}, {field: value, "_id": {"$lt": _id}}]}
+
+
+def next_cursor(items: list, field: str, limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page was the last."""
+    if len(items) < limit:
+        return None
+    return encode_cursor(items[-1][field], items[-1]["_id"])
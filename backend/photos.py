@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+from typing import Optional
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PHOTO_DIR = os.getenv("PHOTO_DIR") or os.path.join(os.path.dirname(__file__), "data", "photos")
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+# Checked from the header before decoding; a small file can declare a huge canvas
+PHOTO_MAX_PIXELS = int(os.getenv("PHOTO_MAX_PIXELS", str(50_000_000)))
+# Absolute prefix for photo URLs (e.g. https://api.example.com). When empty,
+# responses use the URL the request came in on; run uvicorn with
+# --proxy-headers behind a proxy so that is the public one.
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+# Every upload is stored as JPEG in these renditions; thumbnails are square crops
+PHOTO_SIZES = {"original": 2048, "medium": 512, "thumb": 128}
+PHOTO_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def photo_path(photo_id: str, size: str = "original") -> str:
+    suffix = "" if size == "original" else f"_{size}"
+    return os.path.join(PHOTO_DIR, f"{photo_id}{suffix}.jpg")
+
+
+def photo_url(photo_id: str, size: str = "medium", base_url: str = "") -> str:
+    """Absolute when PUBLIC_BASE_URL or base_url (the request's) is known; the app's
+    <Image> can't load a relative path."""
+    prefix = PUBLIC_BASE_URL or base_url.rstrip("/")
+    return f"{prefix}/api/photos/{photo_id}?size={size}"
+
+
+def is_valid_photo_id(photo_id: str) -> bool:
+    return bool(PHOTO_ID_RE.match(photo_id))
+
+
+def decode_inline_photo(value: Optional[str]) -> Optional[bytes]:
+    """Bytes of a data: URI or bare base64 image, or None if value is a URL/path."""
+    if not value:
+        return None
+    if value.startswith("data:"):
+        _, _, value = value.partition(",")
+    elif len(value) < 256 or value.startswith(("http://", "https://", "file:", "/", "content:")):
+        return None
+    try:
+        return base64.b64decode(value, validate=False)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store(raw: bytes) -> str:
+    photo_id = hashlib.sha256(raw).hexdigest()
+    if os.path.exists(photo_path(photo_id, "thumb")):
+        return photo_id  # Same content already stored
+
+    try:
+        image = Image.open(io.BytesIO(raw))
+        if image.width * image.height > PHOTO_MAX_PIXELS:
+            raise HTTPException(status_code=413, detail="Photo dimensions are too large")
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise HTTPException(status_code=400, detail="Unsupported image")
+
+    os.makedirs(PHOTO_DIR, exist_ok=True)
+    for size, px in PHOTO_SIZES.items():
+        if size == "original":
+            rendition = image.copy()
+            rendition.thumbnail((px, px))
+        else:
+            rendition = ImageOps.fit(image, (px, px))
+        out = io.BytesIO()
+        rendition.save(out, "JPEG", quality=88 if size == "original" else 82, optimize=True)
+        _write_atomic(photo_path(photo_id, size), out.getvalue())
+    return photo_id
+
+
+async def store_photo(raw: bytes) -> str:
+    """Store an image under its content hash with all renditions; returns the photo id.
+
+    Decoding and resizing run in a worker thread to keep the event loop free.
+    """
+    if len(raw) > PHOTO_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Photo is too large")
+    return await asyncio.to_thread(_store, raw)
+
+
+def photo_fields(photo_id: str) -> dict:
+    """User document fields for a stored photo."""
+    return {"profilePhotoId": photo_id, "profilePhoto": photo_url(photo_id)}
+
+
+async def migrate_inline_photos(db, batch_size: int = 50) -> dict:
+    """Move profilePhoto data URIs/base64 out of user documents into the blob store."""
+    migrated = skipped = 0
+    query = {"profilePhotoId": {"$exists": False}, "profilePhoto": {"$nin": ["", None]}}
+    cursor = db.users.find(query, {"profilePhoto": 1}).batch_size(batch_size)
+    async for user in cursor:
+        raw = decode_inline_photo(user["profilePhoto"])
+        if raw is None:
+            skipped += 1
+            continue
+        try:
+            photo_id = await store_photo(raw)
+        except HTTPException as e:
+            print(f"⚠️  User {user['_id']}: {e.detail}")
+            skipped += 1
+            continue
+        await db.users.update_one({"_id": user["_id"]}, {"$set": photo_fields(photo_id)})
+        migrated += 1
+    return {"migrated": migrated, "skipped": skipped}
@@ -0,0 +1,202 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from dotenv import load_dotenv
+from auth_utils import decode_token
+from metrics import RATE_LIMITED, SHED_REQUESTS, IN_FLIGHT
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# "memory" keeps buckets per worker; "sqlite" shares them between workers on one host
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/fishnet_ratelimit.db")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Take the client address from X-Forwarded-For; only safe behind a proxy that sets it
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Requests handled at once per worker before new ones are shed with 503; 0 disables
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "256"))
+
+
+def parse_budget(value: str) -> tuple:
+    """"10/60" -> (capacity 10, refill 10 tokens per 60 seconds)."""
+    capacity, _, seconds = value.partition("/")
+    return int(capacity), float(seconds or 60)
+
+
+# Per-route budgets as "requests/seconds", overridable with RATE_LIMIT_<NAME>
+BUDGETS = {
+    name: parse_budget(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+    for name, default in {
+        "login": "10/60",
+        "register": "5/600",
+        "feed": "120/60",
+        "catch_write": "60/60",
+        "photo_upload": "10/600",
+    }.items()
+}
+
+
+# ─── Backends ───────────────────────────────────────────────────────────────────
+
+def _refill(tokens: float, updated: float, now: float, capacity: int, per: float) -> float:
+    return min(capacity, tokens + (now - updated) * capacity / per)
+
+
+class MemoryBackend:
+    """Token buckets in this process; least recently used keys are dropped first."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, capacity: int, per: float) -> float:
+        """Spend one token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = _refill(tokens, updated, now, capacity, per)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) * per / capacity
+        self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteBackend:
+    """Token buckets in a SQLite file, shared by every worker on the host.
+
+    Each take() is one IMMEDIATE transaction, so concurrent workers
+    serialize on the file lock instead of double-spending a token.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+        )
+        self._lock = threading.Lock()
+        self._takes = 0
+
+    def _take(self, key: str, capacity: int, per: float) -> float:
+        now = time.time()  # wall clock, since workers don't share a monotonic clock
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = _refill(*(row or (capacity, now)), now, capacity, per)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) * per / capacity
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens - 1 if not wait else tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._takes += 1
+            if self._takes % 1000 == 0:
+                # Buckets idle this long have refilled; dropping them changes nothing
+                self._conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+        return wait
+
+    async def take(self, key: str, capacity: int, per: float) -> float:
+        return await asyncio.to_thread(self._take, key, capacity, per)
+
+
+def make_backend(name: str):
+    if name == "sqlite":
+        return SQLiteBackend(RATE_LIMIT_SQLITE_PATH)
+    if name == "memory":
+        return MemoryBackend(RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
+
+
+backend = make_backend(RATE_LIMIT_BACKEND)
+
+
+# ─── Dependency ─────────────────────────────────────────────────────────────────
+
+def client_key(request: Request) -> str:
+    """User id from a valid bearer token, otherwise the client address."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            return "user:" + decode_token(auth[7:].strip())
+        except HTTPException:
+            pass
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(",")[0].strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def rate_limit(budget: str):
+    """Route dependency that spends one token from `budget` for the caller.
+
+    Usage: @router.post("/login", dependencies=[Depends(rate_limit("login"))])
+    """
+    capacity, per = BUDGETS[budget]
+
+    async def check(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        wait = await backend.take(f"{budget}:{client_key(request)}", capacity, per)
+        if wait:
+            RATE_LIMITED.labels(budget).inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    return check
+
+
+# ─── Load shedding ──────────────────────────────────────────────────────────────
+
+# Live feed streams stay open for minutes and have their own subscriber cap
+SHED_EXEMPT = {"/health", "/metrics", "/api/catches/live"}
+SHED_BODY = b'{"detail":"Server is busy, try again shortly"}'
+
+
+class ConcurrencyLimitMiddleware:
+    """Reject requests with 503 once MAX_IN_FLIGHT are already being handled.
+
+    Failing fast keeps latency bounded for admitted requests instead of
+    letting every request queue on a saturated event loop.
+    """
+
+    def __init__(self, app, max_in_flight: int = MAX_IN_FLIGHT):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_in_flight or scope["path"] in SHED_EXEMPT:
+            return await self.app(scope, receive, send)
+
+        if self.in_flight >= self.max_in_flight:
+            SHED_REQUESTS.inc()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+            })
+            await send({"type": "http.response.body", "body": SHED_BODY})
+            return
+
+        self.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.dec()
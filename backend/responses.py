@@ -0,0 +1,20 @@
+import orjson
+from fastapi.responses import Response
+
+
+def dumps(content) -> bytes:
+    """Encode straight to JSON bytes; datetimes become ISO 8601, ObjectIds strings."""
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson.
+
+    Routes return this directly, which also skips FastAPI's
+    jsonable_encoder pass over the payload.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from pymongo import UpdateOne
+
+GRANULARITIES = ("day", "week", "month")
+ROLLUP_KEY = ("userId", "granularity", "period", "fishType", "region")
+
+
+def period_start(date: datetime, granularity: str) -> datetime:
+    """Start of the UTC day, ISO week (Monday) or month containing date."""
+    day = datetime(date.year, date.month, date.day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def rollup_deltas(added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> dict:
+    """Net (count, quantity, weight) change per rollup key."""
+    deltas = {}
+    for docs, sign in ((added, 1), (removed, -1)):
+        for c in docs:
+            if not c.get("date"):
+                continue
+            for granularity in GRANULARITIES:
+                key = (c.get("userId"), granularity, period_start(c["date"], granularity),
+                       c.get("fishType"), c.get("region"))
+                count, quantity, weight = deltas.get(key, (0, 0, 0))
+                deltas[key] = (count + sign,
+                               quantity + sign * (c.get("quantity") or 0),
+                               weight + sign * (c.get("weight") or 0))
+    return {k: v for k, v in deltas.items() if any(v)}
+
+
+async def apply_rollup_change(db, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    ops = [
+        UpdateOne(
+            dict(zip(ROLLUP_KEY, key)),
+            {"$inc": {"count": count, "quantity": quantity, "weight": weight}},
+            upsert=True,
+        )
+        for key, (count, quantity, weight) in rollup_deltas(added, removed).items()
+    ]
+    if ops:
+        await db.catch_rollups.bulk_write(ops, ordered=False)
+
+
+def _aggregate_pipeline() -> list:
+    """Full aggregation of catches into rollup documents."""
+    return [
+        {"$match": {"date": {"$type": "date"}}},
+        {"$project": {
+            "userId": 1, "fishType": 1, "region": 1, "quantity": 1, "weight": 1, "date": 1,
+            "granularity": {"$literal": list(GRANULARITIES)},
+        }},
+        {"$unwind": "$granularity"},
+        {"$group": {
+            "_id": {
+                "userId": "$userId",
+                "granularity": "$granularity",
+                "period": {"$dateTrunc": {"date": "$date", "unit": "$granularity", "startOfWeek": "monday"}},
+                "fishType": "$fishType",
+                "region": "$region",
+            },
+            "count": {"$sum": 1},
+            "quantity": {"$sum": "$quantity"},
+            "weight": {"$sum": "$weight"},
+        }},
+        {"$project": {
+            "_id": 0,
+            **{field: f"$_id.{field}" for field in ROLLUP_KEY},
+            "count": 1, "quantity": 1, "weight": 1,
+        }},
+    ]
+
+
+async def rebuild_rollups(db) -> int:
+    """Regenerate catch_rollups from catches in one aggregation pass ($out)."""
+    await db.catches.aggregate(_aggregate_pipeline() + [{"$out": "catch_rollups"}], allowDiskUse=True).to_list(None)
+    return await db.catch_rollups.estimated_document_count()
+
+
+def _close(a, b) -> bool:
+    return abs((a or 0) - (b or 0)) <= 1e-6 * max(1, abs(a or 0), abs(b or 0))
+
+
+async def ensure_rollups(db):
+    """Build catch_rollups on first deploy, when catches exist but no rollups do;
+    /stats reads nothing else and would report zeros."""
+    if await db.catch_rollups.find_one({}, {"_id": 1}) or not await db.catches.find_one({}, {"_id": 1}):
+        return
+    docs = await rebuild_rollups(db)
+    print(f"✅ Built catch rollups from existing catches: {docs} documents")
+
+
+async def check_rollups(db) -> list:
+    """Compare stored rollups with a full aggregation; return the mismatches."""
+    stored = {}
+    async for r in db.catch_rollups.find({"count": {"$ne": 0}}):
+        stored[tuple(r.get(f) for f in ROLLUP_KEY)] = r
+
+    mismatches = []
+    async for expected in db.catches.aggregate(_aggregate_pipeline(), allowDiskUse=True):
+        key = tuple(expected.get(f) for f in ROLLUP_KEY)
+        actual = stored.pop(key, None) or {}
+        if not all(_close(expected[f], actual.get(f)) for f in ("count", "quantity", "weight")):
+            mismatches.append({"key": dict(zip(ROLLUP_KEY, key)), "expected": expected, "actual": actual})
+    for key, actual in stored.items():
+        mismatches.append({"key": dict(zip(ROLLUP_KEY, key)), "expected": None, "actual": actual})
+    return mismatches
+
+
+async def query_rollups(db, user_id: str, granularity: Optional[str] = None,
+                        date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                        group_by: Optional[str] = None) -> dict:
+    """Totals, plus a per-period series when granularity is given, from rollups only.
+
+    Without a date range the rollups of the requested granularity (monthly
+    for plain totals) are read. A range is always applied to the daily
+    rollups and those are grouped into weeks or months, so a month series
+    from the 15th starts at the 15th. Ranges have whole-day resolution:
+    from counts from the start of its day, and to excludes only days that
+    start at or after it.
+    """
+    source = "day" if date_from or date_to else granularity or "month"
+    match = {"userId": user_id, "granularity": source}
+    if date_from or date_to:
+        match["period"] = {}
+        if date_from: match["period"]["$gte"] = period_start(date_from, "day")
+        if date_to:   match["period"]["$lt"] = date_to
+
+    period = "$period"
+    if granularity and granularity != source:
+        period = {"$dateTrunc": {"date": "$period", "unit": granularity, "startOfWeek": "monday"}}
+    group_id = {"period": period} if granularity else {}
+    if group_by:
+        group_id[group_by] = f"${group_by}"
+
+    rows = await db.catch_rollups.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": group_id or None,
+            "count": {"$sum": "$count"},
+            "quantity": {"$sum": "$quantity"},
+            "weight": {"$sum": "$weight"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]).to_list(None)
+
+    count = sum(r["count"] for r in rows)
+    weight = sum(r["weight"] for r in rows)
+    result = {
+        "totalCatches": count,
+        "totalQuantity": sum(r["quantity"] for r in rows),
+        "totalWeight": weight,
+        "avgWeight": weight / count if count else 0,
+    }
+    if granularity or group_by:
+        result["granularity"] = granularity
+        result["series"] = [{
+            **({"period": r["_id"]["period"]} if granularity else {}),
+            **({group_by: r["_id"].get(group_by)} if group_by else {}),
+            "count": r["count"],
+            "quantity": r["quantity"],
+            "weight": r["weight"],
+        } for r in rows if r["count"]]
+    return result
@@ -1,41 +1,77 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, UploadFile, File
 from bson import ObjectId
 from datetime import datetime
+from typing import Optional
+from pymongo import ReturnDocument
 from database import get_db
 from models import (
     UserRegister, UserLogin, UserUpdate,
     PasswordChange, TokenTransaction
 )
 from auth_utils import (
-    hash_password, verify_password,
+    hash_password_async, verify_password_async,
     create_access_token, get_current_user
 )
+from catch_stats import empty_stats
+from user_cache import user_cache
+from ledger import ledger
+from pagination import keyset_filter, next_cursor
+from responses import FastJSONResponse
+from ratelimit import rate_limit
+from photos import store_photo, decode_inline_photo, photo_fields, photo_url, PHOTO_MAX_BYTES
 
 router = APIRouter()
 
+DEFAULT_TOKENS = 800
 
-def user_to_dict(user: dict) -> dict:
-    """Convert MongoDB user document to clean profile dict."""
+
+# Fields read by user_to_dict; profile queries fetch only these
+USER_PROJECTION = {
+    "name": 1, "email": 1, "phone": 1, "licenseId": 1, "region": 1, "boatName": 1,
+    "experience": 1, "profilePhoto": 1, "profilePhotoId": 1, "tokens": 1, "role": 1,
+    "stats.totalCatches": 1, "stats.totalWeight": 1, "stats.uniqueFishTypes": 1, "createdAt": 1,
+}
+
+
+async def _photo_update(value: str) -> dict:
+    """Fields to store for an incoming profilePhoto; inline images go to the blob store."""
+    raw = decode_inline_photo(value)
+    if raw is None:
+        return {"profilePhoto": value, "profilePhotoId": None}
+    return photo_fields(await store_photo(raw))
+
+
+def user_to_dict(user: dict, base_url: str = "") -> dict:
+    """Convert MongoDB user document to clean profile dict.
+
+    base_url is the request's, used for photo URLs when PUBLIC_BASE_URL is unset.
+    """
+    get = user.get
+    stats = get("stats") or {}
     return {
         "id": str(user["_id"]),
-        "name": user.get("name", ""),
-        "email": user.get("email", ""),
-        "phone": user.get("phone", ""),
-        "licenseId": user.get("licenseId", ""),
-        "region": user.get("region", "Tamil Nadu Coast"),
-        "boatName": user.get("boatName", ""),
-        "experience": user.get("experience", 0),
-        "profilePhoto": user.get("profilePhoto", ""),
-        "tokens": user.get("tokens", 800),
-        "role": user.get("role", "fisherman"),
-        "stats": user.get("stats", {"totalCatches": 0, "totalWeight": 0, "uniqueFishTypes": 0}),
-        "createdAt": str(user.get("createdAt", datetime.utcnow())),
+        "name": get("name", ""),
+        "email": get("email", ""),
+        "phone": get("phone", ""),
+        "licenseId": get("licenseId", ""),
+        "region": get("region", "Tamil Nadu Coast"),
+        "boatName": get("boatName", ""),
+        "experience": get("experience", 0),
+        "profilePhoto": photo_url(get("profilePhotoId"), base_url=base_url) if get("profilePhotoId") else get("profilePhoto", ""),
+        "tokens": get("tokens", DEFAULT_TOKENS),
+        "role": get("role", "fisherman"),
+        "stats": {
+            "totalCatches": stats.get("totalCatches", 0),
+            "totalWeight": stats.get("totalWeight", 0),
+            "uniqueFishTypes": stats.get("uniqueFishTypes", 0),
+        },
+        "createdAt": get("createdAt"),
     }
 
 
 # ─── POST /api/auth/register ────────────────────────────────────────────────────
-@router.post("/register", status_code=201)
-async def register(data: UserRegister):
+@router.post("/register", status_code=201, dependencies=[Depends(rate_limit("register"))])
+async def register(data: UserRegister, request: Request):
     db = get_db()
 
     if not data.name or not data.email or not data.password:
@@ -53,69 +89,86 @@ async def register(data: UserRegister):
     user_doc = {
         "name": data.name,
         "email": data.email.lower(),
-        "password": hash_password(data.password),
+        "password": await hash_password_async(data.password),
         "phone": data.phone or "",
         "licenseId": license_id,
         "region": data.region or "Tamil Nadu Coast",
         "boatName": data.boatName or "",
         "experience": data.experience or 0,
-        "profilePhoto": data.profilePhoto or "",
-        "tokens": 800,
+        "profilePhoto": "",
+        "tokens": DEFAULT_TOKENS,
         "role": "fisherman",
         "verified": False,
         "active": True,
-        "stats": {"totalCatches": 0, "totalWeight": 0, "uniqueFishTypes": 0},
+        "stats": empty_stats(),
         "createdAt": datetime.utcnow(),
         "updatedAt": datetime.utcnow(),
     }
 
+    if data.profilePhoto:
+        user_doc.update(await _photo_update(data.profilePhoto))
+
     result = await db.users.insert_one(user_doc)
     user_doc["_id"] = result.inserted_id
     token = create_access_token(str(result.inserted_id))
 
-    return {
+    return FastJSONResponse({
         "success": True,
         "message": "User registered successfully",
-        "data": {"token": token, "user": user_to_dict(user_doc)}
-    }
+        "data": {"token": token, "user": user_to_dict(user_doc, str(request.base_url))}
+    }, status_code=201)
 
 
 # ─── POST /api/auth/login ───────────────────────────────────────────────────────
-@router.post("/login")
-async def login(data: UserLogin):
+@router.post("/login", dependencies=[Depends(rate_limit("login"))])
+async def login(data: UserLogin, request: Request):
     db = get_db()
 
     if not data.email or not data.password:
         raise HTTPException(status_code=400, detail="Please provide email and password")
 
-    user = await db.users.find_one({"email": data.email.lower()})
+    user = await db.users.find_one(
+        {"email": data.email.lower()}, {**USER_PROJECTION, "password": 1, "active": 1}
+    )
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     if not user.get("active", True):
         raise HTTPException(status_code=401, detail="Account is deactivated. Please contact support.")
 
-    if not verify_password(data.password, user["password"]):
+    valid, new_hash = await verify_password_async(data.password, user["password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    # Transparently upgrade hashes made with an old bcrypt cost factor
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
+        user_cache.invalidate(user["_id"])
+
     token = create_access_token(str(user["_id"]))
 
-    return {
+    return FastJSONResponse({
         "success": True,
         "message": "Login successful",
-        "data": {"token": token, "user": user_to_dict(user)}
-    }
+        "data": {"token": token, "user": user_to_dict(user, str(request.base_url))}
+    })
 
 
 # ─── GET /api/auth/me ───────────────────────────────────────────────────────────
 @router.get("/me")
-async def get_me(current_user: dict = Depends(get_current_user)):
-    return {"success": True, "data": user_to_dict(current_user)}
+async def get_me(request: Request, current_user: dict = Depends(get_current_user)):
+    user = current_user
+    if not user.get("profilePhotoId") and user.get("hasProfilePhoto", True):
+        # Not migrated yet: the inline photo is left out of the cached user
+        db = get_db()
+        photo = await db.users.find_one({"_id": current_user["_id"]}, {"profilePhoto": 1})
+        user = {**current_user, "profilePhoto": (photo or {}).get("profilePhoto", "")}
+    return FastJSONResponse({"success": True, "data": user_to_dict(user, str(request.base_url))})
 
 
 # ─── PUT /api/auth/me ───────────────────────────────────────────────────────────
 @router.put("/me")
-async def update_me(data: UserUpdate, current_user: dict = Depends(get_current_user)):
+async def update_me(data: UserUpdate, request: Request, current_user: dict = Depends(get_current_user)):
     db = get_db()
     user_id = current_user["_id"]
 
@@ -125,7 +178,7 @@ async def update_me(data: UserUpdate, current_user: dict = Depends(get_current_u
     if data.region is not None:       update_fields["region"] = data.region
     if data.boatName is not None:     update_fields["boatName"] = data.boatName
     if data.experience is not None:   update_fields["experience"] = data.experience
-    if data.profilePhoto is not None: update_fields["profilePhoto"] = data.profilePhoto
+    if data.profilePhoto is not None: update_fields.update(await _photo_update(data.profilePhoto))
 
     # License ID uniqueness check
     if data.licenseId is not None and data.licenseId != current_user.get("licenseId"):
@@ -137,12 +190,38 @@ async def update_me(data: UserUpdate, current_user: dict = Depends(get_current_u
     update_fields["updatedAt"] = datetime.utcnow()
 
     await db.users.update_one({"_id": user_id}, {"$set": update_fields})
-    updated_user = await db.users.find_one({"_id": user_id})
+    user_cache.invalidate(user_id)
+    updated_user = await db.users.find_one({"_id": user_id}, USER_PROJECTION)
 
-    return {
+    return FastJSONResponse({
         "success": True,
         "message": "Profile updated successfully",
-        "data": {"user": user_to_dict(updated_user)}
+        "data": {"user": user_to_dict(updated_user, str(request.base_url))}
+    })
+
+
+# ─── POST /api/auth/me/photo ────────────────────────────────────────────────────
+@router.post("/me/photo", dependencies=[Depends(rate_limit("photo_upload"))])
+async def upload_photo(request: Request, photo: UploadFile = File(...),
+                       current_user: dict = Depends(get_current_user)):
+    """Upload a profile photo; thumbnails are generated once here."""
+    raw = await photo.read(PHOTO_MAX_BYTES + 1)
+    fields = photo_fields(await store_photo(raw))
+
+    db = get_db()
+    await db.users.update_one(
+        {"_id": current_user["_id"]},
+        {"$set": {**fields, "updatedAt": datetime.utcnow()}}
+    )
+    user_cache.invalidate(current_user["_id"])
+
+    return {
+        "success": True,
+        "message": "Profile photo updated",
+        "data": {
+            "profilePhoto": photo_url(fields["profilePhotoId"], base_url=str(request.base_url)),
+            "photoId": fields["profilePhotoId"],
+        }
     }
 
 
@@ -151,44 +230,94 @@ async def update_me(data: UserUpdate, current_user: dict = Depends(get_current_u
 async def change_password(data: PasswordChange, current_user: dict = Depends(get_current_user)):
     db = get_db()
 
-    if not verify_password(data.currentPassword, current_user["password"]):
+    valid, _ = await verify_password_async(data.currentPassword, current_user["password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Current password is incorrect")
 
+    new_hash = await hash_password_async(data.newPassword)
     await db.users.update_one(
         {"_id": current_user["_id"]},
-        {"$set": {"password": hash_password(data.newPassword), "updatedAt": datetime.utcnow()}}
+        {"$set": {"password": new_hash, "updatedAt": datetime.utcnow()}}
     )
+    user_cache.invalidate(current_user["_id"])
 
     return {"success": True, "message": "Password changed successfully"}
 
 
+# ─── DELETE /api/auth/me ────────────────────────────────────────────────────────
+@router.delete("/me")
+async def deactivate_me(current_user: dict = Depends(get_current_user)):
+    db = get_db()
+    await db.users.update_one(
+        {"_id": current_user["_id"]},
+        {"$set": {"active": False, "updatedAt": datetime.utcnow()}}
+    )
+    user_cache.invalidate(current_user["_id"])
+
+    return {"success": True, "message": "Account deactivated"}
+
+
 # ─── POST /api/auth/logout ──────────────────────────────────────────────────────
 @router.post("/logout")
 async def logout():
     return {"success": True, "message": "Logout successful. Please remove token from client."}
 
 
+async def _inc_tokens(db, user_id, amount: int):
+    """Atomically add amount (negative to spend) and return the new balance.
+
+    Spending is guarded by tokens >= amount in the same write, so concurrent
+    requests cannot overdraw. Returns None if the guard did not match.
+    """
+    query = {"_id": user_id, "tokens": {"$gte": -amount} if amount < 0 else {"$exists": True}}
+    update = {"$inc": {"tokens": amount}, "$set": {"updatedAt": datetime.utcnow()}}
+    user = await db.users.find_one_and_update(
+        query, update, projection={"tokens": 1}, return_document=ReturnDocument.AFTER
+    )
+    if user is None:
+        # Accounts created before tokens were stored start from the default balance
+        init = await db.users.update_one(
+            {"_id": user_id, "tokens": {"$exists": False}}, {"$set": {"tokens": DEFAULT_TOKENS}}
+        )
+        if init.modified_count:
+            user = await db.users.find_one_and_update(
+                query, update, projection={"tokens": 1}, return_document=ReturnDocument.AFTER
+            )
+    user_cache.invalidate(user_id)
+    return user["tokens"] if user else None
+
+
+def _record_transaction(user_id, kind: str, data: TokenTransaction, balance: int):
+    ledger.record({
+        "userId": str(user_id),
+        "type": kind,
+        "amount": data.amount,
+        "reason": data.reason,
+        "balance": balance,
+        "createdAt": datetime.utcnow(),
+    })
+
+
 # ─── POST /api/auth/tokens/spend ────────────────────────────────────────────────
 @router.post("/tokens/spend")
 async def spend_tokens(data: TokenTransaction, current_user: dict = Depends(get_current_user)):
     db = get_db()
-    current_tokens = current_user.get("tokens", 800)
+    if data.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
 
-    if current_tokens < data.amount:
+    new_balance = await _inc_tokens(db, current_user["_id"], -data.amount)
+    if new_balance is None:
+        user = await db.users.find_one({"_id": current_user["_id"]}, {"tokens": 1})
         raise HTTPException(
             status_code=400,
             detail={
                 "error": "Insufficient tokens",
-                "currentTokens": current_tokens,
+                "currentTokens": (user or {}).get("tokens", 0),
                 "required": data.amount
             }
         )
 
-    new_balance = current_tokens - data.amount
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
-        {"$set": {"tokens": new_balance, "updatedAt": datetime.utcnow()}}
-    )
+    _record_transaction(current_user["_id"], "spend", data, new_balance)
 
     return {
         "success": True,
@@ -201,15 +330,50 @@ async def spend_tokens(data: TokenTransaction, current_user: dict = Depends(get_
 @router.post("/tokens/earn")
 async def earn_tokens(data: TokenTransaction, current_user: dict = Depends(get_current_user)):
     db = get_db()
-    new_balance = current_user.get("tokens", 800) + data.amount
+    if data.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
 
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
-        {"$set": {"tokens": new_balance, "updatedAt": datetime.utcnow()}}
-    )
+    new_balance = await _inc_tokens(db, current_user["_id"], data.amount)
+    if new_balance is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    _record_transaction(current_user["_id"], "earn", data, new_balance)
 
     return {
         "success": True,
         "message": f"{data.amount} tokens earned for {data.reason}",
         "tokens": new_balance
     }
+
+
+# ─── GET /api/auth/tokens/history ───────────────────────────────────────────────
+@router.get("/tokens/history")
+async def token_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    db = get_db()
+    await ledger.flush()
+
+    query = {"userId": str(current_user["_id"]), **keyset_filter("createdAt", cursor)}
+    rows = await (
+        db.token_transactions.find(query)
+        .sort([("createdAt", -1), ("_id", -1)])
+        .limit(limit)
+        .to_list(limit)
+    )
+
+    return FastJSONResponse({
+        "success": True,
+        "count": len(rows),
+        "nextCursor": next_cursor(rows, "createdAt", limit),
+        "data": [{
+            "id": str(t["_id"]),
+            "type": t["type"],
+            "amount": t["amount"],
+            "reason": t.get("reason", ""),
+            "balance": t.get("balance"),
+            "createdAt": t["createdAt"],
+        } for t in rows]
+    })
@@ -1,76 +1,195 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import asyncio
+import csv
+import io
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from datetime import datetime
-from database import get_db
-from models import CatchCreate, CatchUpdate
+from datetime import datetime, date
+from database import get_db, get_read_db
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from models import CatchCreate, CatchUpdate, CatchBatch
 from auth_utils import get_current_user
-from typing import Optional
+from ratelimit import rate_limit
+from side_effects import on_catches_changed
+from pagination import keyset_filter, next_cursor
+from feed_cache import feed_cache, etag_matches, make_etag
+from geo import geo_point, parse_bbox, within_radius, within_bbox, MAX_RADIUS_M
+from heatmap import heatmap_tile
+from responses import FastJSONResponse, dumps
+from rollups import query_rollups
+from search import build_search_query, search_planner, MAX_TEXT_LENGTH
+from species import species_index, canonical_fish_type
+import live_feed
+from typing import Optional, Literal
 
 router = APIRouter()
 
+# Newest first; _id breaks ties so keyset cursors are stable
+FEED_SORT = [("date", -1), ("_id", -1)]
+
+
+# Fields read by catch_to_dict; list and detail queries fetch only these
+CATCH_PROJECTION = {
+    "fishType": 1, "quantity": 1, "weight": 1, "location": 1, "date": 1, "time": 1,
+    "userId": 1, "userName": 1, "notes": 1, "weather": 1, "verified": 1, "createdAt": 1,
+    "version": 1, "speciesId": 1,
+}
+# Writes also need what the derived collections are keyed on
+CATCH_WRITE_PROJECTION = {**CATCH_PROJECTION, "region": 1}
+
 
 def catch_to_dict(c: dict) -> dict:
+    """Response dict; datetimes are left for the JSON encoder to format."""
+    get = c.get
     return {
         "id": str(c["_id"]),
-        "fishType": c.get("fishType", ""),
-        "quantity": c.get("quantity", 0),
-        "weight": c.get("weight", 0),
-        "location": c.get("location", {}),
-        "date": str(c.get("date", datetime.utcnow())),
-        "time": c.get("time", ""),
-        "userId": c.get("userId", "anonymous"),
-        "userName": c.get("userName", "Fisher"),
-        "notes": c.get("notes", ""),
-        "weather": c.get("weather"),
-        "verified": c.get("verified", False),
-        "createdAt": str(c.get("createdAt", datetime.utcnow())),
+        "fishType": get("fishType", ""),
+        "speciesId": get("speciesId"),
+        "quantity": get("quantity", 0),
+        "weight": get("weight", 0),
+        "location": get("location") or {},
+        "date": get("date") or get("createdAt"),
+        "time": get("time", ""),
+        "userId": get("userId", "anonymous"),
+        "userName": get("userName", "Fisher"),
+        "notes": get("notes", ""),
+        "weather": get("weather"),
+        "verified": get("verified", False),
+        "createdAt": get("createdAt") or get("date"),
+        "version": get("version", 0),
     }
 
 
-# ─── POST /api/catches ──────────────────────────────────────────────────────────
-@router.post("/", status_code=201)
-async def create_catch(data: CatchCreate, current_user: dict = Depends(get_current_user)):
-    db = get_db()
+def species_fields(fish_type: str) -> dict:
+    """fishType resolved to its canonical species; what was typed is kept in fishTypeRaw."""
+    name, species_id = species_index.canonical(fish_type)
+    return {"fishType": name, "speciesId": species_id, "fishTypeRaw": fish_type if name != fish_type else None}
+
 
-    catch_doc = {
-        "fishType": data.fishType,
+def new_catch_doc(data: CatchCreate, current_user: dict, now: datetime) -> dict:
+    doc = {
+        **{k: v for k, v in species_fields(data.fishType).items() if v is not None},
         "quantity": data.quantity,
         "weight": data.weight,
         "location": data.location.dict(),
-        "date": datetime.utcnow(),
+        "date": now,
         "time": data.time,
         "userId": str(current_user["_id"]),
         "userName": current_user.get("name", "Fisher"),
+        "region": current_user.get("region", "Tamil Nadu Coast"),
         "notes": data.notes or "",
         "weather": data.weather.dict() if data.weather else None,
         "verified": False,
-        "createdAt": datetime.utcnow(),
-        "updatedAt": datetime.utcnow(),
+        "createdAt": now,
+        "updatedAt": now,
+        "version": 1,
     }
+    if data.idempotencyKey:
+        doc["idempotencyKey"] = data.idempotencyKey
+    point = geo_point(doc["location"])
+    if point:
+        doc["geo"] = point
+    return doc
 
-    result = await db.catches.insert_one(catch_doc)
+
+# ─── POST /api/catches ──────────────────────────────────────────────────────────
+@router.post("/", status_code=201, dependencies=[Depends(rate_limit("catch_write"))])
+async def create_catch(data: CatchCreate, current_user: dict = Depends(get_current_user)):
+    db = get_db()
+
+    catch_doc = new_catch_doc(data, current_user, datetime.utcnow())
+
+    try:
+        result = await db.catches.insert_one(catch_doc)
+    except DuplicateKeyError:
+        # Retried upload: return the catch stored by the first attempt
+        existing = await db.catches.find_one(
+            {"userId": catch_doc["userId"], "idempotencyKey": data.idempotencyKey}, CATCH_PROJECTION
+        )
+        if not existing:
+            raise
+        return FastJSONResponse({"success": True, "message": "Catch already recorded", "data": catch_to_dict(existing)})
     catch_doc["_id"] = result.inserted_id
 
-    # Update user stats
-    all_catches = await db.catches.find({"userId": str(current_user["_id"])}).to_list(None)
-    unique_fish = list({c["fishType"] for c in all_catches})
-    total_weight = sum(c.get("weight", 0) for c in all_catches)
-
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
-        {"$set": {
-            "stats.totalCatches": len(all_catches),
-            "stats.totalWeight": total_weight,
-            "stats.uniqueFishTypes": len(unique_fish),
-            "updatedAt": datetime.utcnow()
-        }}
-    )
+    await on_catches_changed(db, current_user["_id"], added=[catch_doc])
 
-    return {
+    return FastJSONResponse({
         "success": True,
         "message": "Catch recorded successfully",
         "data": catch_to_dict(catch_doc)
-    }
+    }, status_code=201)
+
+
+# ─── POST /api/catches/batch ────────────────────────────────────────────────────
+@router.post("/batch", dependencies=[Depends(rate_limit("catch_write"))])
+async def create_catches_batch(data: CatchBatch, current_user: dict = Depends(get_current_user)):
+    """Ingest catches queued offline in one request.
+
+    Items are written with a single unordered insert_many and user stats
+    are updated once. Each item gets a result: created, duplicate (same
+    idempotencyKey already stored or earlier in the batch), invalid or failed.
+    """
+    db = get_db()
+    now = datetime.utcnow()
+    results = [None] * len(data.items)
+    docs, positions, batch_keys = [], [], {}
+
+    for i, item in enumerate(data.items):
+        try:
+            catch = CatchCreate.model_validate(item)
+        except ValidationError as e:
+            results[i] = {"index": i, "status": "invalid",
+                          "errors": e.errors(include_url=False, include_context=False)}
+            continue
+        key = catch.idempotencyKey
+        if key and key in batch_keys:
+            results[i] = {"index": i, "status": "duplicate", "duplicateOf": batch_keys[key]}
+            continue
+        if key:
+            batch_keys[key] = i
+        docs.append(new_catch_doc(catch, current_user, now))
+        positions.append(i)
+
+    failed = {}
+    if docs:
+        try:
+            await db.catches.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {err["index"]: err for err in e.details.get("writeErrors", [])}
+
+    # Look up the stored ids for items that were already uploaded
+    dup_keys = [docs[j]["idempotencyKey"] for j, err in failed.items() if err.get("code") == 11000]
+    existing = {}
+    if dup_keys:
+        async for c in db.catches.find(
+            {"userId": str(current_user["_id"]), "idempotencyKey": {"$in": dup_keys}},
+            {"idempotencyKey": 1}
+        ):
+            existing[c["idempotencyKey"]] = str(c["_id"])
+
+    added = []
+    for j, doc in enumerate(docs):
+        i = positions[j]
+        err = failed.get(j)
+        if err is None:
+            added.append(doc)
+            results[i] = {"index": i, "status": "created", "id": str(doc["_id"])}
+        elif err.get("code") == 11000:
+            results[i] = {"index": i, "status": "duplicate", "id": existing.get(doc["idempotencyKey"])}
+        else:
+            results[i] = {"index": i, "status": "failed", "error": err.get("errmsg", "Write failed")}
+
+    await on_catches_changed(db, current_user["_id"], added=added)
+
+    return FastJSONResponse({
+        "success": True,
+        "created": len(added),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "rejected": sum(1 for r in results if r["status"] in ("invalid", "failed")),
+        "results": results,
+    })
 
 
 # ─── GET /api/catches ───────────────────────────────────────────────────────────
@@ -78,125 +197,428 @@ async def create_catch(data: CatchCreate, current_user: dict = Depends(get_curre
 async def get_catches(
     fishType: Optional[str] = Query(None),
     limit: int = Query(50, le=200),
-    skip: int = Query(0),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    skip: int = Query(0, deprecated=True, description="Use cursor instead"),
     current_user: dict = Depends(get_current_user)
 ):
     db = get_db()
     query = {"userId": str(current_user["_id"])}
     if fishType:
-        query["fishType"] = fishType
+        query["fishType"] = canonical_fish_type(fishType)
 
-    cursor = db.catches.find(query).sort("date", -1).skip(skip).limit(limit)
-    catches = await cursor.to_list(limit)
+    cursor_query = db.catches.find({**query, **keyset_filter("date", cursor)}, CATCH_PROJECTION).sort(FEED_SORT)
+    if skip and not cursor:
+        cursor_query = cursor_query.skip(skip)
+    catches = await cursor_query.limit(limit).to_list(limit)
 
-    return {
+    return FastJSONResponse({
         "success": True,
         "count": len(catches),
+        "nextCursor": next_cursor(catches, "date", limit),
         "data": [catch_to_dict(c) for c in catches]
-    }
+    })
 
 
 # ─── GET /api/catches/all ───────────────────────────────────────────────────────
-@router.get("/all")
+def _feed_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/all", dependencies=[Depends(rate_limit("feed"))])
 async def get_all_catches(
+    request: Request,
     fishType: Optional[str] = Query(None),
     limit: int = Query(100, le=500),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
 ):
-    """Public endpoint - all fishermen's catches (no auth required)."""
-    db = get_db()
+    """Public endpoint - all fishermen's catches (no auth required).
+
+    First pages are served from the feed cache; send If-None-Match with the
+    last ETag to get a 304 when nothing changed.
+    """
+    fishType = canonical_fish_type(fishType)
+    key = (fishType, limit)
+    if not cursor:
+        cached = feed_cache.get(key)
+        if cached:
+            return _feed_response(request, *cached)
+    generation = feed_cache.generation
+
+    # A first page is cached and served until the next write, so it must not come
+    # from a secondary that hasn't replicated that write yet; later pages may
+    db = get_read_db() if cursor else get_db()
     query = {}
     if fishType:
         query["fishType"] = fishType
 
-    cursor = db.catches.find(query).sort("date", -1).limit(limit)
-    catches = await cursor.to_list(limit)
+    cursor_query = db.catches.find({**query, **keyset_filter("date", cursor)}, CATCH_PROJECTION).sort(FEED_SORT)
+    catches = await cursor_query.limit(limit).to_list(limit)
 
-    return {
+    body = dumps({
         "success": True,
         "count": len(catches),
+        "nextCursor": next_cursor(catches, "date", limit),
         "data": [catch_to_dict(c) for c in catches]
-    }
+    })
+
+    etag = make_etag(body) if cursor else feed_cache.put(key, body, generation)
+    return _feed_response(request, etag, body)
 
 
 # ─── GET /api/catches/stats ─────────────────────────────────────────────────────
 @router.get("/stats")
-async def get_stats(current_user: dict = Depends(get_current_user)):
-    db = get_db()
-    pipeline = [
-        {"$match": {"userId": str(current_user["_id"])}},
-        {"$group": {
-            "_id": None,
-            "totalCatches": {"$sum": 1},
-            "totalQuantity": {"$sum": "$quantity"},
-            "totalWeight": {"$sum": "$weight"},
-            "avgWeight": {"$avg": "$weight"},
-        }}
-    ]
-    result = await db.catches.aggregate(pipeline).to_list(1)
-    stats = result[0] if result else {
-        "totalCatches": 0, "totalQuantity": 0,
-        "totalWeight": 0, "avgWeight": 0
+async def get_stats(
+    granularity: Optional[Literal["day", "week", "month"]] = Query(None),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Counted from the start of this day (UTC)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Days starting at or after this are excluded"),
+    groupBy: Optional[Literal["fishType", "region"]] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Totals, and optionally a per-period series, read from catch_rollups only.
+
+    Date ranges have whole-day resolution; a week or month series over a
+    range starts and ends at the range, not at the enclosing periods.
+    """
+    stats = await query_rollups(
+        get_read_db(), str(current_user["_id"]), granularity, date_from, date_to, groupBy
+    )
+    return FastJSONResponse({"success": True, "data": stats})
+
+
+# ─── GET /api/catches/export ────────────────────────────────────────────────────
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_PROJECTION = {
+    "fishType": 1, "quantity": 1, "weight": 1, "location": 1, "date": 1,
+    "time": 1, "notes": 1, "verified": 1, "createdAt": 1,
+}
+CSV_COLUMNS = [
+    "id", "date", "time", "fishType", "quantity", "weight",
+    "latitude", "longitude", "address", "notes", "verified", "createdAt",
+]
+
+
+def _iso(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else ""
+
+
+def _export_row(c: dict) -> dict:
+    location = c.get("location") or {}
+    return {
+        "id": str(c["_id"]),
+        "date": _iso(c.get("date")),
+        "time": c.get("time", ""),
+        "fishType": c.get("fishType", ""),
+        "quantity": c.get("quantity", 0),
+        "weight": c.get("weight", 0),
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "address": location.get("address", ""),
+        "notes": c.get("notes", ""),
+        "verified": c.get("verified", False),
+        "createdAt": _iso(c.get("createdAt")),
     }
-    stats.pop("_id", None)
 
-    return {"success": True, "data": stats}
+
+async def _export_chunks(cursor, fmt: str):
+    """Yield the export in ~64KB chunks; only one batch is held in memory."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS)
+    if fmt == "csv":
+        writer.writeheader()
+
+    async for c in cursor:
+        row = _export_row(c)
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            buf.write(dumps(row).decode("utf-8"))
+            buf.write("\n")
+        if buf.tell() >= EXPORT_CHUNK_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+@router.get("/export")
+async def export_catches(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream the user's full catch history, oldest first, as NDJSON or CSV."""
+    db = get_db()
+    query = {"userId": str(current_user["_id"])}
+    if date_from or date_to:
+        query["date"] = {}
+        if date_from: query["date"]["$gte"] = date_from
+        if date_to:   query["date"]["$lt"] = date_to
+
+    cursor = (
+        db.catches.find(query, EXPORT_PROJECTION)
+        .sort([("date", 1), ("_id", 1)])
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"catches-{current_user['_id']}.{format}"
+
+    return StreamingResponse(
+        _export_chunks(cursor, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ─── GET /api/catches/nearby ────────────────────────────────────────────────────
+@router.get("/nearby", dependencies=[Depends(rate_limit("feed"))])
+async def get_nearby_catches(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius: float = Query(5000, gt=0, le=MAX_RADIUS_M, description="Metres around lat/lng"),
+    bbox: Optional[str] = Query(None, description="minLng,minLat,maxLng,maxLat"),
+    fishType: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(200, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+):
+    """Public endpoint - catches inside a radius or the visible map viewport."""
+    if bbox:
+        query = {"geo": within_bbox(parse_bbox(bbox))}
+    elif lat is not None and lng is not None:
+        query = {"geo": within_radius(lat, lng, radius)}
+    else:
+        raise HTTPException(status_code=400, detail="Provide lat and lng, or bbox")
+
+    if fishType:
+        query["fishType"] = canonical_fish_type(fishType)
+    if date_from or date_to:
+        query["date"] = {}
+        if date_from: query["date"]["$gte"] = date_from
+        if date_to:   query["date"]["$lt"] = date_to
+
+    db = get_read_db()
+    cursor_query = db.catches.find({**query, **keyset_filter("date", cursor)}, CATCH_PROJECTION).sort(FEED_SORT)
+    catches = await cursor_query.limit(limit).to_list(limit)
+
+    return FastJSONResponse({
+        "success": True,
+        "count": len(catches),
+        "nextCursor": next_cursor(catches, "date", limit),
+        "data": [catch_to_dict(c) for c in catches]
+    })
+
+
+# ─── GET /api/catches/heatmap ───────────────────────────────────────────────────
+@router.get("/heatmap", dependencies=[Depends(rate_limit("feed"))])
+async def get_heatmap(
+    bbox: str = Query(..., description="minLng,minLat,maxLng,maxLat"),
+    zoom: int = Query(..., ge=0, le=22),
+    fishType: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    """Public endpoint - catch density per grid cell, read from the rollup."""
+    tile = await heatmap_tile(
+        get_read_db(), zoom, parse_bbox(bbox), canonical_fish_type(fishType),
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None,
+    )
+    return {"success": True, "data": tile}
+
+
+# ─── GET /api/catches/search ────────────────────────────────────────────────────
+@router.get("/search", dependencies=[Depends(rate_limit("feed"))])
+async def search_catches(
+    q: Optional[str] = Query(None, max_length=MAX_TEXT_LENGTH, description="Words in notes or location address"),
+    userId: Optional[str] = Query(None),
+    fishType: Optional[str] = Query(None),
+    verified: Optional[bool] = Query(None),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    minWeight: Optional[float] = Query(None, ge=0),
+    maxWeight: Optional[float] = Query(None, ge=0),
+    minQuantity: Optional[float] = Query(None, ge=0),
+    maxQuantity: Optional[float] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+):
+    """Public endpoint - catches matching every given filter, newest first.
+
+    Weight and quantity ranges need userId, fishType, verified or q too;
+    combinations no index serves are rejected with 400.
+    """
+    query = build_search_query(
+        userId=userId, fishType=canonical_fish_type(fishType), verified=verified,
+        date_from=date_from, date_to=date_to, min_weight=minWeight, max_weight=maxWeight,
+        min_quantity=minQuantity, max_quantity=maxQuantity, text=q,
+    )
+    query.update(keyset_filter("date", cursor))
+    index = search_planner.plan(query)
+
+    db = get_read_db()
+    cursor_query = db.catches.find(query, CATCH_PROJECTION).sort(FEED_SORT)
+    if index:
+        cursor_query = cursor_query.hint(index)
+    catches = await cursor_query.limit(limit).to_list(limit)
+
+    return FastJSONResponse({
+        "success": True,
+        "count": len(catches),
+        "nextCursor": next_cursor(catches, "date", limit),
+        "data": [catch_to_dict(c) for c in catches]
+    })
+
+
+def _catch_oid(catch_id: str) -> ObjectId:
+    if not ObjectId.is_valid(catch_id):
+        raise HTTPException(status_code=400, detail="Invalid catch ID")
+    return ObjectId(catch_id)
+
+
+def _version_etag(c: dict) -> str:
+    return f'"{c.get("version", 0)}"'
+
+
+def _if_match_filter(if_match: Optional[str]) -> dict:
+    """Filter on the version named by an If-Match header (absent or * matches any)."""
+    if not if_match or if_match.strip() == "*":
+        return {}
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=412, detail="Catch was modified by another client")
+    version = int(tag)
+    # Catches stored before versioning have no version field; treat that as 0
+    return {"version": version if version else {"$in": [0, None]}}
+
+
+async def _raise_mutation_failure(db, oid: ObjectId, current_user: dict, action: str):
+    """The conditional write matched nothing; find out why (error path only)."""
+    c = await db.catches.find_one({"_id": oid}, {"userId": 1, "version": 1})
+    if not c:
+        raise HTTPException(status_code=404, detail="Catch not found")
+    if c["userId"] != str(current_user["_id"]):
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this catch")
+    raise HTTPException(
+        status_code=412,
+        detail="Catch was modified by another client",
+        headers={"ETag": _version_etag(c)},
+    )
+
+
+# ─── GET /api/catches/live ──────────────────────────────────────────────────────
+@router.get("/live", dependencies=[Depends(rate_limit("feed"))])
+async def live_catches(
+    fishType: Optional[str] = Query(None),
+    bbox: Optional[str] = Query(None, description="minLng,minLat,maxLng,maxLat"),
+):
+    """Public endpoint - server-sent events for catches as they are created,
+    updated and deleted. Replaces polling /all; a client that receives a
+    "lagged" event fell too far behind and should reload /all.
+    """
+    sub = live_feed.broadcaster.subscribe(canonical_fish_type(fishType), parse_bbox(bbox) if bbox else None)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many live feed connections", headers={"Retry-After": "5"})
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=live_feed.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                if item is None:
+                    return
+                if item is live_feed.LAGGED:
+                    yield b"event: lagged\ndata: {}\n\n"
+                    return
+                yield item
+        finally:
+            live_feed.broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ─── GET /api/catches/{id} ──────────────────────────────────────────────────────
 @router.get("/{catch_id}")
 async def get_catch(catch_id: str, current_user: dict = Depends(get_current_user)):
     db = get_db()
-    try:
-        c = await db.catches.find_one({"_id": ObjectId(catch_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid catch ID")
-
+    c = await db.catches.find_one({"_id": _catch_oid(catch_id)}, CATCH_PROJECTION)
     if not c:
         raise HTTPException(status_code=404, detail="Catch not found")
 
-    return {"success": True, "data": catch_to_dict(c)}
+    return FastJSONResponse({"success": True, "data": catch_to_dict(c)}, headers={"ETag": _version_etag(c)})
 
 
 # ─── PUT /api/catches/{id} ──────────────────────────────────────────────────────
 @router.put("/{catch_id}")
-async def update_catch(catch_id: str, data: CatchUpdate, current_user: dict = Depends(get_current_user)):
+async def update_catch(
+    catch_id: str,
+    data: CatchUpdate,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Update in one round trip. Send If-Match with the catch's ETag to have
+    the update rejected (412) if someone else changed it first."""
     db = get_db()
-    try:
-        c = await db.catches.find_one({"_id": ObjectId(catch_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid catch ID")
-
-    if not c:
-        raise HTTPException(status_code=404, detail="Catch not found")
-    if c["userId"] != str(current_user["_id"]):
-        raise HTTPException(status_code=403, detail="Not authorized to update this catch")
+    oid = _catch_oid(catch_id)
 
     update_fields = {"updatedAt": datetime.utcnow()}
-    if data.fishType is not None:  update_fields["fishType"] = data.fishType
+    if data.fishType is not None:  update_fields.update(species_fields(data.fishType))
     if data.quantity is not None:  update_fields["quantity"] = data.quantity
     if data.weight is not None:    update_fields["weight"] = data.weight
     if data.notes is not None:     update_fields["notes"] = data.notes
 
-    await db.catches.update_one({"_id": ObjectId(catch_id)}, {"$set": update_fields})
-    updated = await db.catches.find_one({"_id": ObjectId(catch_id)})
+    # The pre-image is needed for the derived stats; the post-image is the
+    # pre-image with the $set applied, so no second read is required.
+    c = await db.catches.find_one_and_update(
+        {"_id": oid, "userId": str(current_user["_id"]), **_if_match_filter(if_match)},
+        {"$set": update_fields, "$inc": {"version": 1}},
+        projection=CATCH_WRITE_PROJECTION,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if c is None:
+        await _raise_mutation_failure(db, oid, current_user, "update")
+
+    updated = {**c, **update_fields, "version": c.get("version", 0) + 1}
+    await on_catches_changed(db, current_user["_id"], added=[updated], removed=[c])
 
-    return {"success": True, "message": "Catch updated", "data": catch_to_dict(updated)}
+    return FastJSONResponse(
+        {"success": True, "message": "Catch updated", "data": catch_to_dict(updated)},
+        headers={"ETag": _version_etag(updated)},
+    )
 
 
 # ─── DELETE /api/catches/{id} ───────────────────────────────────────────────────
 @router.delete("/{catch_id}")
-async def delete_catch(catch_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_catch(
+    catch_id: str,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     db = get_db()
-    try:
-        c = await db.catches.find_one({"_id": ObjectId(catch_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid catch ID")
+    oid = _catch_oid(catch_id)
 
-    if not c:
-        raise HTTPException(status_code=404, detail="Catch not found")
-    if c["userId"] != str(current_user["_id"]):
-        raise HTTPException(status_code=403, detail="Not authorized to delete this catch")
+    c = await db.catches.find_one_and_delete(
+        {"_id": oid, "userId": str(current_user["_id"]), **_if_match_filter(if_match)},
+        projection=CATCH_WRITE_PROJECTION,
+    )
+    if c is None:
+        await _raise_mutation_failure(db, oid, current_user, "delete")
 
-    await db.catches.delete_one({"_id": ObjectId(catch_id)})
+    await on_catches_changed(db, current_user["_id"], removed=[c])
 
     return {"success": True, "message": "Catch deleted"}
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional, Literal
+from auth_utils import get_current_user
+from leaderboard import leaderboards, LEADERBOARD_SIZE
+from ratelimit import rate_limit
+
+router = APIRouter()
+
+Window = Literal["week", "month", "all"]
+Metric = Literal["weight", "catches"]
+
+
+# ─── GET /api/leaderboard ───────────────────────────────────────────────────────
+@router.get("/", dependencies=[Depends(rate_limit("feed"))])
+async def get_leaderboard(
+    window: Window = Query("week"),
+    metric: Metric = Query("weight"),
+    region: Optional[str] = Query(None, description="Omit for the global board"),
+    limit: int = Query(20, ge=1, le=LEADERBOARD_SIZE),
+):
+    """Public endpoint - top fishers, served from the in-process top-K."""
+    entries = await leaderboards.top(window, region, metric, limit)
+    return {
+        "success": True,
+        "window": window,
+        "metric": metric,
+        "region": region,
+        "count": len(entries),
+        "data": entries,
+    }
+
+
+# ─── GET /api/leaderboard/me ────────────────────────────────────────────────────
+@router.get("/me")
+async def get_my_rank(
+    window: Window = Query("week"),
+    metric: Metric = Query("weight"),
+    region: Optional[str] = Query(None, description="Omit for the global board"),
+    current_user: dict = Depends(get_current_user)
+):
+    rank = await leaderboards.my_rank(current_user["_id"], window, region, metric)
+    return {"success": True, "window": window, "metric": metric, "region": region, "data": rank}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import Literal
+import os
+from photos import photo_path, is_valid_photo_id
+
+router = APIRouter()
+
+
+# ─── GET /api/photos/{id} ───────────────────────────────────────────────────────
+@router.get("/{photo_id}")
+async def get_photo(photo_id: str, size: Literal["original", "medium", "thumb"] = Query("medium")):
+    """Photos are content-addressed, so a URL never changes content and can be cached forever."""
+    if not is_valid_photo_id(photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    path = photo_path(photo_id, size)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{photo_id}-{size}"',
+        },
+    )
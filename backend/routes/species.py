@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Query
+from species import species_index
+
+router = APIRouter()
+
+
+# ─── GET /api/species ───────────────────────────────────────────────────────────
+@router.get("/")
+async def list_species():
+    """Public endpoint - the canonical species dictionary."""
+    species = sorted(species_index.species.values(), key=lambda s: s["name"])
+    return {"success": True, "count": len(species), "data": species}
+
+
+# ─── GET /api/species/autocomplete ──────────────────────────────────────────────
+@router.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(10, ge=1, le=25),
+):
+    """Public endpoint - species matching a partly typed name, alias or local name.
+
+    Answered from the in-memory trie and trigram index; tolerates a typo
+    or two in longer queries.
+    """
+    matches = species_index.suggest(q, limit)
+    return {"success": True, "count": len(matches), "data": matches}
@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from indexes import INDEXES
+
+# Indexes a catch search may be planned onto, most selective first
+SEARCH_INDEXES = ["userId_date_id_search", "fishType_date_id_search", "verified_date_id_search", "date_id"]
+MAX_TEXT_LENGTH = 200
+
+
+def _range(low=None, high=None, high_exclusive: bool = False) -> Optional[dict]:
+    bounds = {}
+    if low is not None:
+        bounds["$gte"] = low
+    if high is not None:
+        bounds["$lt" if high_exclusive else "$lte"] = high
+    return bounds or None
+
+
+def build_search_query(
+    userId: Optional[str] = None,
+    fishType: Optional[str] = None,
+    verified: Optional[bool] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_weight: Optional[float] = None,
+    max_weight: Optional[float] = None,
+    min_quantity: Optional[float] = None,
+    max_quantity: Optional[float] = None,
+    text: Optional[str] = None,
+) -> dict:
+    """Mongo filter for a catch search; fishType must already be canonical."""
+    query = {}
+    if userId:
+        query["userId"] = userId
+    if fishType:
+        query["fishType"] = fishType
+    if verified is not None:
+        query["verified"] = verified
+    for field, bounds in (
+        ("date", _range(date_from, date_to, high_exclusive=True)),
+        ("weight", _range(min_weight, max_weight)),
+        ("quantity", _range(min_quantity, max_quantity)),
+    ):
+        if bounds:
+            query[field] = bounds
+    if text and text.strip():
+        query["$text"] = {"$search": text.strip()}
+    return query
+
+
+class SearchPlanner:
+    """Picks the registered index that serves a search's query shape.
+
+    An index fits when every one of its leading equality keys is filtered
+    on and every filtered field is one of its keys, so the whole filter is
+    checked in the index. Shapes no index fits are rejected rather than
+    left to Mongo, which would walk the feed index or the collection.
+    """
+
+    def __init__(self, models: list, names: list):
+        keys = {m.document["name"]: list(m.document["key"]) for m in models}
+        self.plans = []  # (name, equality prefix, all keys)
+        for name in names:
+            fields = keys[name]
+            self.plans.append((name, set(fields[:fields.index("date")]), set(fields)))
+
+    def plan(self, query: dict) -> Optional[str]:
+        """Index name to hint, or None for text searches (Mongo picks the text index itself)."""
+        if "$text" in query:
+            return None
+        fields, equality = set(), set()
+        for field, value in query.items():
+            if field == "$or":
+                fields.update(k for clause in value for k in clause)
+            else:
+                fields.add(field)
+                if not isinstance(value, dict):
+                    equality.add(field)
+
+        best = None
+        for name, prefix, keys in self.plans:
+            if prefix <= equality and fields <= keys and (best is None or len(prefix) > len(best[1])):
+                best = (name, prefix)
+        if best is None:
+            ranged = ", ".join(sorted(fields - {"date", "_id"} - equality))
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filtering on {ranged} needs userId, fishType, verified or q as well",
+            )
+        return best[0]
+
+
+search_planner = SearchPlanner(INDEXES["catches"], SEARCH_INDEXES)
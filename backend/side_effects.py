@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from typing import Dict, Iterable
+from bson import ObjectId
+from dotenv import load_dotenv
+from database import get_db
+from catch_stats import apply_stats_changes, rebuild_user_stats
+from feed_cache import feed_cache
+from heatmap import apply_heatmap_change
+from rollups import apply_rollup_change
+from leaderboard import leaderboards, rebuild_leaderboard_scores
+from metrics import SIDE_EFFECT_QUEUE_DEPTH, SIDE_EFFECT_FLUSH
+import live_feed
+
+load_dotenv()
+
+SIDE_EFFECT_BATCH_SIZE = int(os.getenv("SIDE_EFFECT_BATCH_SIZE", "500"))
+SIDE_EFFECT_FLUSH_INTERVAL = float(os.getenv("SIDE_EFFECT_FLUSH_INTERVAL", "0.2"))
+
+
+async def apply_catch_changes(db, changes: Dict[ObjectId, tuple]):
+    """Bring everything derived from catches up to date for a batch of writes.
+
+    `changes` maps user id to (added, removed). An update is passed as
+    removed=[old] and added=[new]; each consumer applies the net difference.
+    """
+    all_added = [c for added, _ in changes.values() for c in added]
+    all_removed = [c for _, removed in changes.values() for c in removed]
+    users = await apply_stats_changes(db, changes)
+    await apply_heatmap_change(db, added=all_added, removed=all_removed)
+    await apply_rollup_change(db, added=all_added, removed=all_removed)
+    for user_id, (added, removed) in changes.items():
+        await leaderboards.apply_change(db, users.get(user_id), added=added, removed=removed)
+
+
+class SideEffectQueue:
+    """Collects catch changes per user and applies them off the request path.
+
+    Changes for the same user are merged until the next flush, so a burst
+    of inserts costs one stats write. Flushes run every flush_interval
+    seconds, as soon as batch_size changes are pending, and on shutdown.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._depth = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._stopping = asyncio.Event()
+        self._flushes = set()  # early flushes started by add(); held so they aren't collected
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def add(self, user_id: ObjectId, added: list, removed: list):
+        entry = self._pending.setdefault(user_id, ([], []))
+        entry[0].extend(added)
+        entry[1].extend(removed)
+        self._depth += len(added) + len(removed)
+        SIDE_EFFECT_QUEUE_DEPTH.set(self._depth)
+        if self._depth >= self.batch_size:
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def pending(self) -> int:
+        return self._depth
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending, self._depth = self._pending, {}, 0
+            SIDE_EFFECT_QUEUE_DEPTH.set(0)
+            start = time.perf_counter()
+            try:
+                await apply_catch_changes(get_db(), batch)
+            except Exception as e:
+                # Any error, not just Mongo ones: the loop must survive to flush later writes
+                await self._recover(batch, e)
+            SIDE_EFFECT_FLUSH.observe(time.perf_counter() - start)
+
+    async def _recover(self, batch: dict, error: Exception):
+        """The $inc writes are not idempotent, so a failed batch is not replayed.
+        Stats and leaderboard scores are rebuilt from catches; rollups and
+        heatmap need an admin rebuild."""
+        print(f"⚠️  Side effects for {len(batch)} users failed: {type(error).__name__}: {error}")
+        for user_id in batch:
+            try:
+                await rebuild_user_stats(get_db(), user_id)
+            except Exception as e:
+                print(f"⚠️  Could not rebuild stats for {user_id}: {e}")
+        try:
+            await rebuild_leaderboard_scores(get_db(), list(batch))
+        except Exception as e:
+            print(f"⚠️  Could not rebuild leaderboard scores: {e}; run manage.py rebuild-leaderboards")
+        leaderboards.invalidate()
+        print("⚠️  Run manage.py check-rollups; rebuild-rollups and rebuild-heatmap if they disagree")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Let the loop finish its current flush rather than cancelling it.
+        A cancelled flush would lose the batch it already took from _pending."""
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"⚠️  Side effect queue stopped with an error: {e}")
+            self._task = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+
+side_effect_queue = SideEffectQueue(SIDE_EFFECT_BATCH_SIZE, SIDE_EFFECT_FLUSH_INTERVAL)
+
+
+async def on_catches_changed(db, user_id: ObjectId, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    """Called after every catch write.
+
+    In-process state (feed cache, live feed) is updated right away; the
+    derived collections are queued for the next flush. Outside the app
+    (admin commands, scripts) the queue isn't running and they are applied
+    inline instead.
+    """
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+    feed_cache.invalidate({c.get("fishType") for c in added + removed})
+    live_feed.fanout.publish(added=added, removed=removed)
+    if side_effect_queue.running:
+        side_effect_queue.add(user_id, added, removed)
+    else:
+        await apply_catch_changes(db, {user_id: (added, removed)})
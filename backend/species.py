@@ -0,0 +1,240 @@
+import json
+import os
+import unicodedata
+from collections import defaultdict
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SPECIES_FILE = os.getenv("SPECIES_FILE") or os.path.join(os.path.dirname(__file__), "data", "species.json")
+RESOLVE_CACHE_SIZE = 10000
+MAX_FUZZY_CANDIDATES = 24
+
+
+def normalize_name(text: Optional[str]) -> str:
+    """Casefold and collapse punctuation/whitespace; combining marks (Tamil vowel signs) are kept."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    chars = [" " if unicodedata.category(ch)[0] in "PSZC" else ch for ch in text]
+    return " ".join("".join(chars).split())
+
+
+def ngrams(text: str, n: int = 3) -> set:
+    padded = "  " + text
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def edit_distance(a: str, b: str, limit: int, prefix: bool = False) -> int:
+    """Edit distance counting a transposition as one edit, capped at limit + 1.
+
+    With prefix=True, a is compared against the best-matching prefix of b,
+    which is what autocomplete needs for partially typed names.
+    """
+    if not prefix and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if prefix:
+        b = b[:len(a) + limit]
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, before[j - 2] + 1)
+            cur.append(d)
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    best = min(prev[max(0, len(a) - limit):]) if prefix else prev[-1]
+    return min(best, limit + 1)
+
+
+def allowed_typos(length: int) -> int:
+    """Typos tolerated when suggesting names for a query of this length."""
+    return 0 if length < 4 else 1 if length < 8 else 2
+
+
+def resolve_typos(length: int) -> int:
+    """Stricter budget for silently rewriting a stored fishType."""
+    return 0 if length < 5 else 1 if length < 9 else 2
+
+
+class SpeciesIndex:
+    """Canonical species with every alias and local name indexed two ways.
+
+    A prefix trie over each name and each word within it answers
+    autocomplete for correctly typed input; a trigram index narrows typo
+    candidates to a handful that are then checked by edit distance.
+    Everything is built once at import and only read afterwards.
+    """
+
+    def __init__(self, species: List[dict]):
+        self.species = {s["id"]: s for s in species}
+        self.terms = []                # (normalized name, species id, name as written)
+        self.exact = defaultdict(set)  # normalized name -> species ids
+        self.trie = {}
+        self.grams = defaultdict(set)  # trigram -> indexes into self.entries
+        self.entries = []              # (word-suffix text, term index)
+        self._resolved = {}
+
+        for s in species:
+            names = [s["name"], *s.get("aliases", [])]
+            for local in s.get("local", {}).values():
+                names.extend(local)
+            for name in names:
+                self._add_term(name, s["id"])
+
+    @classmethod
+    def from_file(cls, path: str) -> "SpeciesIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["species"])
+
+    def _add_term(self, name: str, species_id: str):
+        norm = normalize_name(name)
+        if not norm or species_id in self.exact[norm]:
+            return
+        term = len(self.terms)
+        self.terms.append((norm, species_id, name))
+        self.exact[norm].add(species_id)
+
+        # Index from each word start so "mack" finds "Indian Mackerel"
+        words = norm.split(" ")
+        for w in range(len(words)):
+            text = " ".join(words[w:])
+            node = self.trie
+            for ch in text:
+                node = node.setdefault(ch, {})
+                node.setdefault(None, []).append(term)
+            entry = len(self.entries)
+            self.entries.append((text, term))
+            for gram in ngrams(text):
+                self.grams[gram].add(entry)
+
+    def _match(self, species_id: str, term: int, distance: int) -> dict:
+        s = self.species[species_id]
+        return {
+            "speciesId": species_id,
+            "name": s["name"],
+            "scientific": s.get("scientific", ""),
+            "matched": self.terms[term][2],
+            "distance": distance,
+        }
+
+    def _fuzzy_entries(self, query: str, typos: int):
+        """Entries sharing enough trigrams with query to be within `typos` edits, best first.
+
+        Each edit changes at most three trigrams, so anything sharing fewer
+        than len(grams) - 3 * typos cannot match and is never compared.
+        """
+        grams = ngrams(query)
+        counts = defaultdict(int)
+        for gram in grams:
+            for entry in self.grams.get(gram, ()):
+                counts[entry] += 1
+        needed = max(1, len(grams) - 3 * typos)
+        candidates = [e for e, n in counts.items() if n >= needed]
+        candidates.sort(key=counts.get, reverse=True)
+        return candidates[:MAX_FUZZY_CANDIDATES]
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """Species whose names start with query, then near misses within the typo budget."""
+        q = normalize_name(query)
+        if not q:
+            return []
+        best = {}  # species id -> (rank key, term, distance)
+
+        node = self.trie
+        for ch in q:
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            for term in node[None]:
+                norm, species_id, _ = self.terms[term]
+                key = (0, norm != q, not norm.startswith(q), len(norm))
+                if species_id not in best or key < best[species_id][0]:
+                    best[species_id] = (key, term, 0)
+
+        typos = allowed_typos(len(q))
+        if len(best) < limit and typos:
+            for entry in self._fuzzy_entries(q, typos):
+                text, term = self.entries[entry]
+                species_id = self.terms[term][1]
+                if species_id in best and best[species_id][0][0] == 0:
+                    continue
+                distance = edit_distance(q, text, typos, prefix=True)
+                if distance > typos:
+                    continue
+                key = (1, distance, len(text))
+                if species_id not in best or key < best[species_id][0]:
+                    best[species_id] = (key, term, distance)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0])[:limit]
+        return [self._match(species_id, term, distance) for species_id, (_, term, distance) in ranked]
+
+    def resolve(self, fish_type: Optional[str]) -> Optional[dict]:
+        """The species a free-text fishType names, or None if unknown or ambiguous."""
+        q = normalize_name(fish_type)
+        if q in self._resolved:
+            return self._resolved[q]
+
+        species_id = None
+        ids = self.exact.get(q)
+        if ids:
+            species_id = next(iter(ids)) if len(ids) == 1 else None
+        elif resolve_typos(len(q)):
+            typos = resolve_typos(len(q))
+            matches = {}
+            for entry in self._fuzzy_entries(q, typos):
+                text, term = self.entries[entry]
+                norm, candidate, _ = self.terms[term]
+                if text != norm:
+                    continue  # whole names only; "tuna" must not resolve via a word suffix
+                distance = edit_distance(q, norm, typos)
+                if distance <= typos:
+                    matches[candidate] = min(distance, matches.get(candidate, distance))
+            if matches:
+                closest = min(matches.values())
+                winners = [c for c, d in matches.items() if d == closest]
+                species_id = winners[0] if len(winners) == 1 else None
+
+        resolved = self.species[species_id] if species_id else None
+        if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[q] = resolved
+        return resolved
+
+    def canonical(self, fish_type: Optional[str]) -> Tuple[str, Optional[str]]:
+        """(fishType to store or filter on, speciesId); unknown names are kept as typed."""
+        species = self.resolve(fish_type)
+        if species:
+            return species["name"], species["id"]
+        return (fish_type or "").strip(), None
+
+
+species_index = SpeciesIndex.from_file(SPECIES_FILE)
+
+
+def canonical_fish_type(fish_type: Optional[str]) -> Optional[str]:
+    """Canonical name for a fishType filter; None stays None."""
+    return species_index.canonical(fish_type)[0] if fish_type else fish_type
+
+
+async def normalize_catch_species(db) -> int:
+    """Rewrite stored fishType values to canonical names and set speciesId. Returns catches updated."""
+    updated = 0
+    for fish_type in await db.catches.distinct("fishType"):
+        if not isinstance(fish_type, str):
+            continue
+        name, species_id = species_index.canonical(fish_type)
+        if species_id is None:
+            continue
+        update = {"fishType": name, "speciesId": species_id}
+        if name != fish_type:
+            update["fishTypeRaw"] = fish_type
+        result = await db.catches.update_many(
+            {"fishType": fish_type, "$or": [{"fishType": {"$ne": name}}, {"speciesId": {"$ne": species_id}}]},
+            {"$set": update},
+        )
+        updated += result.modified_count
+    return updated
@@ -0,0 +1,49 @@
+import asyncio
+import ledger
+from ledger import LedgerWriter
+
+
+class SlowCollection:
+    def __init__(self):
+        self.written = []
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(0.3)
+        self.written.extend(docs)
+
+
+class FakeDb:
+    def __init__(self):
+        self.token_transactions = SlowCollection()
+
+
+def test_stop_finishes_an_insert_in_progress(monkeypatch):
+    db = FakeDb()
+    monkeypatch.setattr(ledger, "get_db", lambda: db)
+
+    async def scenario():
+        writer = LedgerWriter(batch_size=1000, flush_interval=0.01)
+        writer.start()
+        writer.record({"amount": 5})
+        await asyncio.sleep(0.05)  # the loop has taken the entry and is inserting it
+        assert writer.pending() == 0 and not db.token_transactions.written
+        writer.record({"amount": 7})
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert [e["amount"] for e in db.token_transactions.written] == [5, 7]
+
+
+def test_early_flushes_are_awaited_on_stop(monkeypatch):
+    db = FakeDb()
+    monkeypatch.setattr(ledger, "get_db", lambda: db)
+
+    async def scenario():
+        writer = LedgerWriter(batch_size=2, flush_interval=60)
+        writer.start()
+        for amount in range(5):
+            writer.record({"amount": amount})
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert sorted(e["amount"] for e in db.token_transactions.written) == [0, 1, 2, 3, 4]
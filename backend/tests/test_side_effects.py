@@ -0,0 +1,56 @@
+import asyncio
+from bson import ObjectId
+import side_effects
+from side_effects import SideEffectQueue
+
+
+def test_stop_finishes_a_flush_in_progress(monkeypatch):
+    applied = []
+
+    async def slow_apply(db, changes):
+        await asyncio.sleep(0.3)
+        applied.append(changes)
+
+    monkeypatch.setattr(side_effects, "apply_catch_changes", slow_apply)
+    monkeypatch.setattr(side_effects, "get_db", lambda: None)
+
+    async def scenario():
+        queue = SideEffectQueue(batch_size=1000, flush_interval=0.01)
+        queue.start()
+        queue.add(ObjectId(), [{"weight": 1}], [])
+        await asyncio.sleep(0.05)  # the loop has taken the batch and is applying it
+        assert queue.pending() == 0 and not applied
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert len(applied) == 1
+    assert queue.pending() == 0 and not queue.running
+
+
+def test_loop_survives_a_failed_flush(monkeypatch):
+    calls = []
+
+    async def flaky_apply(db, changes):
+        calls.append(changes)
+        if len(calls) == 1:
+            raise ValueError("bad catch")
+
+    async def no_recover(batch, error):
+        pass
+
+    monkeypatch.setattr(side_effects, "apply_catch_changes", flaky_apply)
+    monkeypatch.setattr(side_effects, "get_db", lambda: None)
+
+    async def scenario():
+        queue = SideEffectQueue(batch_size=1000, flush_interval=0.01)
+        monkeypatch.setattr(queue, "_recover", no_recover)
+        queue.start()
+        queue.add(ObjectId(), [{"weight": 1}], [])
+        await asyncio.sleep(0.05)
+        queue.add(ObjectId(), [{"weight": 2}], [])
+        await asyncio.sleep(0.05)
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
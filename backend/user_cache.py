@@ -0,0 +1,81 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+# profilePhoto is left out of cached user documents, since an unmigrated inline
+# photo is too heavy to carry on every request. hasProfilePhoto records whether
+# it is set, so /me only fetches it when there is one.
+USER_CACHE_STAGES = [
+    {"$set": {"hasProfilePhoto": {"$ne": [{"$ifNull": ["$profilePhoto", ""]}, ""]}}},
+    {"$project": {"profilePhoto": 0}},
+]
+
+
+async def load_cacheable_user(db, user_id) -> Optional[dict]:
+    """The user document as cached: profilePhoto replaced by hasProfilePhoto."""
+    docs = await db.users.aggregate([{"$match": {"_id": user_id}}, *USER_CACHE_STAGES]).to_list(1)
+    return docs[0] if docs else None
+
+
+class UserCache:
+    """In-process TTL + LRU cache of user documents keyed by user id.
+
+    Each worker has its own copy, so routes that change a user must call
+    invalidate(); the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, user_id: str, user: dict):
+        if self.maxsize <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id):
+        self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)